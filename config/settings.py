@@ -49,6 +49,9 @@ DATA_DIR = os.path.join(PROJECT_ROOT, "data")
 RAW_DATA_DIR = os.path.join(DATA_DIR, "raw")
 PROCESSED_DATA_DIR = os.path.join(DATA_DIR, "processed")
 
+# Persistent cache for immutable historical prices (SQLite)
+BIRDEYE_PRICE_CACHE_PATH = os.path.join(PROCESSED_DATA_DIR, "birdeye_price_cache.sqlite")
+
 # Source code directory
 SRC_DIR = os.path.join(PROJECT_ROOT, "src")
 
@@ -64,6 +67,10 @@ FLASK_HOST = os.getenv("FLASK_HOST", "127.0.0.1")
 FLASK_PORT = int(os.getenv("FLASK_PORT", "8080"))
 FLASK_DEBUG = os.getenv("FLASK_DEBUG", "false").lower() == "true"
 
+# Production server (gunicorn.conf.py): worker processes x threads per worker
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", str(min(os.cpu_count() or 1, 4))))
+SERVER_THREADS = int(os.getenv("SERVER_THREADS", "8"))
+
 
 # ============================================================================
 # Constants
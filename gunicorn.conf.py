@@ -0,0 +1,28 @@
+"""
+Gunicorn configuration for PnL Research (production server)
+
+Usage (from the project root):
+    gunicorn
+
+Runs src/main.py's Flask app in N worker processes x M threads (gthread),
+so concurrent chart viewers are served in parallel instead of one request
+at a time. Bind address and pool sizes come from config/settings.py (.env).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config.settings import FLASK_HOST, FLASK_PORT, SERVER_WORKERS, SERVER_THREADS
+
+wsgi_app = "src.main:app"
+bind = f"{FLASK_HOST}:{FLASK_PORT}"
+
+worker_class = "gthread"
+workers = SERVER_WORKERS
+threads = SERVER_THREADS
+
+# Requests can wait on slow upstream APIs (Birdeye timeouts are up to 30 s)
+timeout = 60
+keepalive = 5
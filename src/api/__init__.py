@@ -1,5 +1,6 @@
 # PnL Research - API Clients
 from .birdeye_client import BirdeyeClient
 from .solscan_client import SolscanClient
+from ._http import close_shared_session
 
-__all__ = ['BirdeyeClient', 'SolscanClient']
+__all__ = ['BirdeyeClient', 'SolscanClient', 'close_shared_session']
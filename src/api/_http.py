@@ -0,0 +1,127 @@
+"""
+共享 HTTP 会话
+所有 API 客户端复用同一个进程级 aiohttp.ClientSession (连接池)
+
+客户端频繁创建/销毁时，每次都要重新进行 TCP + TLS 握手 (数百毫秒)。
+共享 session 后 keep-alive 连接和 TLS 会话可以跨客户端复用。
+
+注意：共享 session 不携带任何 API Key，鉴权 headers 由各客户端在每次请求时传入，
+避免 Birdeye 的 X-API-KEY 与 Solscan 的 token 相互覆盖。
+
+另外提供各客户端共用的小工具 (日志级别选择)。
+"""
+
+import asyncio
+import atexit
+import logging
+import aiohttp
+from typing import Optional, Set
+
+
+# API 客户端的包级 logger (src.api)，各模块 logger 的父级
+_package_logger = logging.getLogger(__name__.rpartition(".")[0])
+
+
+def _log_level(verbose: bool) -> int:
+    """
+    verbose=True 的调用以 INFO 级别记录，否则为 DEBUG (未启用时不做任何格式化)
+
+    verbose=True 时确保 INFO 日志确实会输出：未配置 logging 时默认只显示 WARNING 以上，
+    因此按需降低包级 logger 的级别，且在没有任何 handler 时挂上一个输出到 stderr 的 handler。
+    """
+    if not verbose:
+        return logging.DEBUG
+
+    if not _package_logger.isEnabledFor(logging.INFO):
+        _package_logger.setLevel(logging.INFO)
+    if not _package_logger.hasHandlers():
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _package_logger.addHandler(handler)
+    return logging.INFO
+
+
+_shared_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+_closing: Set[asyncio.Task] = set()  # 关闭旧 session 的任务 (保持引用，避免被回收)
+
+
+def _get_shared_session() -> aiohttp.ClientSession:
+    """
+    获取 (必要时创建) 进程级共享 session
+
+    session 与创建它的事件循环绑定；如果当前运行的是另一个事件循环
+    (例如多次调用 asyncio.run)，则为当前循环重新创建一个，并关闭旧的 session。
+    每次请求前调用即可 (只做几次比较)。
+    """
+    global _shared_session, _session_loop
+
+    loop = asyncio.get_running_loop()
+    if _shared_session is None or _shared_session.closed or _session_loop is not loop:
+        if _shared_session is not None and not _shared_session.closed:
+            _close_stale_session(_shared_session, _session_loop, loop)
+
+        connector = aiohttp.TCPConnector(
+            limit=200,
+            limit_per_host=30,
+            ttl_dns_cache=600,            # 长时间运行的任务不必频繁重新解析 DNS
+            happy_eyeballs_delay=0.1,     # IPv6/IPv4 并行建连，避免首连卡在不可达的地址族上
+            enable_cleanup_closed=True,   # 及时回收异常关闭的 TLS 连接
+            keepalive_timeout=75
+        )
+        _shared_session = aiohttp.ClientSession(connector=connector)
+        _session_loop = loop
+
+    return _shared_session
+
+
+def _close_stale_session(
+    session: aiohttp.ClientSession,
+    old_loop: Optional[asyncio.AbstractEventLoop],
+    loop: asyncio.AbstractEventLoop
+):
+    """关闭属于另一个事件循环的 session (避免 "Unclosed connector" 警告)"""
+    if old_loop is not None and old_loop.is_running():
+        # 旧循环仍在其他线程中运行：在它自己的循环里关闭
+        asyncio.run_coroutine_threadsafe(session.close(), old_loop)
+        return
+
+    # 旧循环已结束：在当前循环中关闭连接器
+    task = loop.create_task(_close_quietly(session))
+    _closing.add(task)
+    task.add_done_callback(_closing.discard)
+
+
+async def _close_quietly(session: aiohttp.ClientSession):
+    try:
+        await session.close()
+    except Exception:
+        # 旧循环已关闭，部分连接无法正常关闭，只需释放连接器
+        pass
+
+
+async def close_shared_session():
+    """显式关闭共享 session (应用退出前调用)"""
+    global _shared_session, _session_loop
+
+    if _shared_session is not None and not _shared_session.closed:
+        await _shared_session.close()
+    _shared_session = None
+    _session_loop = None
+
+
+def _close_shared_session_at_exit():
+    """进程退出时的兜底清理"""
+    session = _shared_session
+    if session is None or session.closed:
+        return
+
+    loop = _session_loop
+    if loop is not None and not loop.is_closed() and not loop.is_running():
+        loop.run_until_complete(session.close())
+    else:
+        # 事件循环已关闭，无法再 await，只能释放连接器引用
+        session.detach()
+
+
+atexit.register(_close_shared_session_at_exit)
@@ -9,69 +9,122 @@ API 文档参考：
 
 import asyncio
 import aiohttp
-import time
-from typing import Optional, Dict, List, Any
+import bisect
+import logging
+import numpy as np
+import orjson
+from typing import Optional, Dict, List, Any, Tuple, Hashable, Callable, Awaitable
 from dataclasses import dataclass
 from datetime import datetime
+from operator import itemgetter
 
+from cachetools import LRUCache, TTLCache
+
+from ._http import _get_shared_session, _log_level
+from .rate_limiter import RateLimiter
+from .price_store import PriceStore
+
+
+logger = logging.getLogger(__name__)
 
-@dataclass
-class BirdeyePriceResult:
-    """Birdeye 价格查询结果"""
-    success: bool
-    value: Optional[float] = None          # USD 价格 (高精度，如 128.09276765626564)
-    update_unix_time: Optional[int] = None  # 价格更新的 Unix 时间戳
-    price_change_24h: Optional[float] = None  # 24小时价格变化百分比
-    error: Optional[str] = None            # 错误信息
 
+# /defi/history_price 的 type 参数对应的秒数
+_INTERVAL_SECONDS = {
+    "1m": 60, "3m": 180, "5m": 300, "15m": 900, "30m": 1800,
+    "1H": 3600, "2H": 7200, "4H": 14400, "6H": 21600, "8H": 28800, "12H": 43200,
+    "1D": 86400, "3D": 259200, "1W": 604800, "1M": 2592000,
+}
 
-class RateLimiter:
+# 单次 /defi/history_price 查询最多返回的价格点数 (超过的范围需要拆分查询)
+_HISTORY_MAX_POINTS = 1000
+
+
+def _history_points(items: List[Dict[str, Any]]) -> Tuple[List[int], List[float]]:
     """
-    速率限制器 - 防止触发 API 限制
+    把价格历史条目转换为按时间排序的 (times, values)
 
-    Birdeye Starter 版 ($99/月):
-    - 15 rps (每秒15个请求)
-    - 5M CUs/月
+    跳过 unixTime / value 缺失或为 null 的条目，避免一个坏点让整个查询失败。
     """
+    points = sorted(
+        (it["unixTime"], float(it["value"]))
+        for it in items
+        if it.get("unixTime") is not None and it.get("value") is not None
+    )
+    return [t for t, _ in points], [v for _, v in points]
 
-    def __init__(self, max_per_minute: int = 800, min_interval: float = 0.08):
-        """
-        Args:
-            max_per_minute: 每分钟最大请求数 (Starter版 15rps=900/min, 建议800)
-            min_interval: 请求之间最小间隔秒数 (Starter版建议 0.08)
-        """
-        self.max_per_minute = max_per_minute
-        self.min_interval = min_interval
-        self.minute_requests: List[float] = []
-        self.last_request_time: float = 0
-        self.lock = asyncio.Lock()
-
-    async def acquire(self):
-        """获取请求许可"""
-        async with self.lock:
-            now = time.time()
-
-            # 清理过期记录
-            self.minute_requests = [r for r in self.minute_requests if now - r < 60]
-
-            # 检查每分钟限制
-            if len(self.minute_requests) >= self.max_per_minute:
-                sleep_time = 60 - (now - self.minute_requests[0])
-                if sleep_time > 0:
-                    print(f"    [RateLimit] 达到每分钟限制，等待 {sleep_time:.1f} 秒...")
-                    await asyncio.sleep(sleep_time)
-                    self.minute_requests = []
-
-            # 确保请求间隔
-            time_since_last = now - self.last_request_time
-            if time_since_last < self.min_interval:
-                wait_time = self.min_interval - time_since_last
-                await asyncio.sleep(wait_time)
-
-            # 记录请求
-            current_time = time.time()
-            self.minute_requests.append(current_time)
-            self.last_request_time = current_time
+
+def _history_windows(time_from: int, time_to: int, step: int) -> List[Tuple[int, int]]:
+    """
+    把 [time_from, time_to] (秒) 拆成若干个不超过单次返回上限的查询窗口
+
+    每个窗口长度为 _HISTORY_MAX_POINTS * step - 1 秒 (最多覆盖 _HISTORY_MAX_POINTS 个价格点)，
+    相邻窗口首尾相接、不重叠。
+    """
+    stride = _HISTORY_MAX_POINTS * step
+    return [
+        (start, min(start + stride - 1, time_to))
+        for start in range(time_from, time_to + 1, stride)
+    ]
+
+
+# 大于该值的时间戳视为 13 位毫秒时间戳
+_TS_MAX_SEC = 10_000_000_000
+
+
+# OHLCV 结构化数组 (t: unixTime 秒, o/h/l/c: 价格, v: 成交量)
+OHLCV_DTYPE = np.dtype([
+    ("t", "i8"),
+    ("o", "f8"),
+    ("h", "f8"),
+    ("l", "f8"),
+    ("c", "f8"),
+    ("v", "f8"),
+])
+
+# 按 OHLCV_DTYPE 字段顺序取出 OHLCV 条目的各字段
+_OHLCV_KEYS = ("unixTime", "o", "h", "l", "c", "v")
+_OHLCV_ROW = itemgetter(*_OHLCV_KEYS)
+
+
+def _ohlcv_to_array(items: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    OHLCV 条目 → OHLCV_DTYPE 结构化数组
+
+    缺失或为 null 的字段按 0 处理 (与 sync_engine 的 _with_birdeye_defaults 一致)，并记录警告，
+    而不是抛出 KeyError 或静默变成 NaN。
+    """
+    try:
+        # 已知长度：直接写入预分配的数组，不构造中间的元组列表
+        array = np.fromiter(map(_OHLCV_ROW, items), dtype=OHLCV_DTYPE, count=len(items))
+        # JSON 中不存在 NaN，出现 NaN 说明某个价格/成交量为 null
+        if not any(np.isnan(array[name]).any() for name in OHLCV_DTYPE.names[1:]):
+            return array
+    except (KeyError, TypeError):
+        pass
+
+    bad = sum(1 for it in items if any(it.get(key) is None for key in _OHLCV_KEYS))
+    logger.warning("[Birdeye] OHLCV 中有 %d 条数据缺少字段或为 null，按 0 处理", bad)
+    return np.fromiter(
+        (tuple(it.get(key) or 0 for key in _OHLCV_KEYS) for it in items),
+        dtype=OHLCV_DTYPE,
+        count=len(items)
+    )
+
+
+def _to_seconds(ts: int) -> int:
+    """把 10 位秒 / 13 位毫秒时间戳统一为 10 位秒"""
+    ts = int(ts)
+    return ts // 1000 if ts > _TS_MAX_SEC else ts
+
+
+@dataclass(slots=True, frozen=True)
+class BirdeyePriceResult:
+    """Birdeye 价格查询结果 (不可变；缓存中可能有大量实例，使用 __slots__ 节省内存)"""
+    success: bool
+    value: Optional[float] = None          # USD 价格 (高精度，如 128.09276765626564)
+    update_unix_time: Optional[int] = None  # 价格更新的 Unix 时间戳
+    price_change_24h: Optional[float] = None  # 24小时价格变化百分比
+    error: Optional[str] = None            # 错误信息
 
 
 class BirdeyeClient:
@@ -87,7 +140,18 @@ class BirdeyeClient:
     BASE_URL = "https://public-api.birdeye.so"
     SOL_MINT = "So11111111111111111111111111111111111111112"
 
-    def __init__(self, api_key: str, requests_per_minute: int = 800, min_interval: float = 0.08):
+    # 请求超时 (类级常量，避免每次请求重新构造 ClientTimeout)
+    _TIMEOUT_SHORT = aiohttp.ClientTimeout(total=10)    # 实时价格
+    _TIMEOUT_DEFAULT = aiohttp.ClientTimeout(total=15)  # 单点历史价格
+    _TIMEOUT_LONG = aiohttp.ClientTimeout(total=30)     # 价格历史 / OHLCV
+
+    def __init__(
+        self,
+        api_key: str,
+        requests_per_minute: int = 800,
+        min_interval: float = 0.08,
+        disk_cache_path: Optional[str] = None
+    ):
         """
         初始化 Birdeye 客户端
 
@@ -95,9 +159,16 @@ class BirdeyeClient:
             api_key: Birdeye API Key
             requests_per_minute: 每分钟最大请求数 (Starter版 15rps = 900/min, 建议800)
             min_interval: 请求最小间隔秒数 (Starter版 15rps, 建议 0.08秒)
+            disk_cache_path: 历史价格持久化缓存 (SQLite) 路径，None 表示不启用
+                             (推荐 config.settings.BIRDEYE_PRICE_CACHE_PATH)
         """
         self.api_key = api_key
         self.session: Optional[aiohttp.ClientSession] = None
+        self._headers = {
+            "accept": "application/json",
+            "x-chain": "solana",
+            "X-API-KEY": api_key
+        }
         self.rate_limiter = RateLimiter(max_per_minute=requests_per_minute, min_interval=min_interval)
 
         # 统计信息
@@ -106,23 +177,45 @@ class BirdeyeClient:
         self.failed_requests = 0
         self.cache_hits = 0
 
-        # 简单缓存 (避免重复查询同一时间点)
-        self._price_cache: Dict[str, BirdeyePriceResult] = {}
+        # 历史价格缓存 (避免重复查询同一时间点)
+        # 历史价格不会变化，TTL 可以设置得较长；容量有上限，防止长时间运行的任务内存泄漏
+        self._price_cache: Dict[Tuple[str, int], BirdeyePriceResult] = TTLCache(maxsize=100_000, ttl=6 * 3600)
+        # 实时价格缓存 (短 TTL)
+        self._current_price_cache: Dict[str, BirdeyePriceResult] = TTLCache(maxsize=10_000, ttl=30)
+        # 历史价格磁盘缓存 (第二级，跨进程持久化)
+        self._disk_cache: Optional[PriceStore] = PriceStore(disk_cache_path) if disk_cache_path else None
+
+        # 条件请求缓存: (url, 参数...) -> (校验头, 上次解码后的 items)
+        # 范围数据大多不可变，服务端返回 304 时直接复用上次结果
+        self._etag_cache: Dict[Tuple, Tuple[Dict[str, str], List[Dict[str, Any]]]] = LRUCache(maxsize=1_000)
+
+        # 进行中的请求 (single-flight: 相同 key 的并发查询只发出一次 HTTP 请求)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
 
     async def _ensure_session(self):
-        """确保 session 已初始化"""
-        if self.session is None or self.session.closed:
-            headers = {
-                "accept": "application/json",
-                "x-chain": "solana",
-                "X-API-KEY": self.api_key
-            }
-            self.session = aiohttp.ClientSession(headers=headers)
+        """
+        获取当前事件循环的进程级共享 session
+
+        每次请求前都重新获取 (不缓存判断)，客户端跨多个 asyncio.run 复用时
+        不会拿到已关闭事件循环上的 session。
+        """
+        self.session = _get_shared_session()
 
     async def close(self):
-        """关闭 session"""
-        if self.session and not self.session.closed:
-            await self.session.close()
+        """
+        释放 session 引用 (共享 session 由 _http 模块统一关闭)，并将磁盘缓存落盘后关闭
+
+        关闭后不再使用磁盘缓存 (内存缓存仍然有效)。
+        """
+        self.session = None
+        if self._disk_cache is not None:
+            store, self._disk_cache = self._disk_cache, None
+            await asyncio.to_thread(store.close)
+
+    async def _maybe_flush_disk_cache(self):
+        """磁盘缓存缓冲区满时在线程池中批量写盘，不阻塞事件循环"""
+        if self._disk_cache is not None and self._disk_cache.pending >= self._disk_cache.flush_size:
+            await asyncio.to_thread(self._disk_cache.flush)
 
     async def __aenter__(self):
         """Context manager entry - ensures session is initialized"""
@@ -130,13 +223,67 @@ class BirdeyeClient:
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit - closes session"""
+        """Context manager exit - releases the shared session reference"""
         await self.close()
         return False
 
-    def _make_cache_key(self, address: str, timestamp: int) -> str:
-        """生成缓存键"""
-        return f"{address}_{timestamp}"
+    async def _single_flight(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[BirdeyePriceResult]]
+    ) -> BirdeyePriceResult:
+        """
+        合并相同 key 的并发请求
+
+        第一个调用者执行 fetch()，其余调用者等待同一个 Future 的结果。
+        执行 fetch() 的调用者被取消时，等待方不会收到 CancelledError，而是重新发起请求
+        (其中一个成为新的执行者)。
+        """
+        while True:
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            try:
+                # shield: 等待方被取消时不影响共享的 Future
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # 只有等待方自身被取消时才向上抛出
+                if not inflight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # 标记为已读取，没有等待方时不产生 "never retrieved" 警告
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    def _conditional_headers(self, key: Tuple) -> Dict[str, str]:
+        """附加 If-None-Match / If-Modified-Since 请求头 (如有上次的校验值)"""
+        cached = self._etag_cache.get(key)
+        if cached is None:
+            return self._headers
+        return {**self._headers, **cached[0]}
+
+    def _store_validators(self, key: Tuple, response: aiohttp.ClientResponse, items: List[Dict[str, Any]]):
+        """保存响应的 ETag / Last-Modified，供下次条件请求使用"""
+        etag = response.headers.get("ETag")
+        if etag:
+            self._etag_cache[key] = ({"If-None-Match": etag}, items)
+            return
+        last_modified = response.headers.get("Last-Modified")
+        if last_modified:
+            self._etag_cache[key] = ({"If-Modified-Since": last_modified}, items)
 
     async def get_price_at_timestamp(
         self,
@@ -154,33 +301,70 @@ class BirdeyeClient:
             address: 代币合约地址 (Mint Address)
             timestamp: 10位 Unix 时间戳 (秒)
             use_cache: 是否使用缓存
-            verbose: 是否输出详细日志
+            verbose: 是否以 INFO 级别记录详细日志 (否则为 DEBUG)
 
         Returns:
             BirdeyePriceResult 包含价格或错误信息
         """
-        # 确保 timestamp 是 10 位整数
-        timestamp = int(timestamp)
-        if timestamp > 10000000000:
-            # 如果是 13 位毫秒时间戳，转换为秒
-            timestamp = timestamp // 1000
+        # 确保 timestamp 是 10 位整数 (13 位毫秒时间戳转换为秒)
+        return await self._get_price_at_seconds(address, _to_seconds(timestamp), use_cache, verbose)
 
+    async def _get_price_at_seconds(
+        self,
+        address: str,
+        timestamp: int,
+        use_cache: bool,
+        verbose: bool
+    ) -> BirdeyePriceResult:
+        """get_price_at_timestamp 的内部路径，timestamp 须已是 10 位秒"""
         # 检查缓存
-        cache_key = self._make_cache_key(address, timestamp)
-        if use_cache and cache_key in self._price_cache:
-            self.cache_hits += 1
-            if verbose:
-                print(f"  [Cache] 命中缓存: {address[:8]}... @ {timestamp}")
-            return self._price_cache[cache_key]
+        cache_key = (address, timestamp)
+        if use_cache:
+            cached = self._price_cache.get(cache_key)
+            if cached is not None:
+                self.cache_hits += 1
+                logger.log(_log_level(verbose), "[Cache] 命中缓存: %s... @ %s", address[:8], timestamp)
+                return cached
+
+            if self._disk_cache is not None:
+                row = self._disk_cache.get(address, timestamp)
+                if row is not None:
+                    result = BirdeyePriceResult(success=True, value=row[0], update_unix_time=row[1])
+                    self._price_cache[cache_key] = result
+                    self.cache_hits += 1
+                    logger.log(_log_level(verbose), "[Cache] 命中磁盘缓存: %s... @ %s", address[:8], timestamp)
+                    return result
+
+        return await self._single_flight(
+            cache_key,
+            lambda: self._fetch_price_at_timestamp(address, timestamp, use_cache, verbose)
+        )
+
+    async def _fetch_price_at_timestamp(
+        self,
+        address: str,
+        timestamp: int,
+        use_cache: bool,
+        verbose: bool,
+        retry: bool = True
+    ) -> BirdeyePriceResult:
+        """
+        请求 /defi/historical_price_unix (不检查缓存)
+
+        遇到 429 时通知 rate_limiter 全局退避 (所有并发请求一起暂停)，
+        retry=True 时退避后自动重试一次。
+        """
+        cache_key = (address, timestamp)
 
         await self._ensure_session()
         await self.rate_limiter.acquire()
 
         self.total_requests += 1
 
-        if verbose:
+        level = _log_level(verbose)
+        if logger.isEnabledFor(level):
             dt = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
-            print(f"  [Birdeye] 查询 {address[:8]}... @ {timestamp} ({dt})")
+            logger.log(level, "[Birdeye] 查询 %s... @ %s (%s)", address[:8], timestamp, dt)
 
         try:
             url = f"{self.BASE_URL}/defi/historical_price_unix"
@@ -189,9 +373,10 @@ class BirdeyeClient:
                 "unixtime": timestamp
             }
 
-            async with self.session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=15)) as response:
+            async with self.session.get(url, params=params, headers=self._headers, timeout=self._TIMEOUT_DEFAULT) as response:
                 if response.status == 200:
-                    data = await response.json()
+                    self.rate_limiter.reset_backoff()
+                    data = orjson.loads(await response.read())
 
                     if data.get("success") and data.get("data"):
                         price_data = data["data"]
@@ -205,9 +390,11 @@ class BirdeyeClient:
 
                         if use_cache:
                             self._price_cache[cache_key] = result
+                            if self._disk_cache is not None:
+                                self._disk_cache.put(address, timestamp, result.value, result.update_unix_time)
+                                await self._maybe_flush_disk_cache()
 
-                        if verbose:
-                            print(f"    ✅ 成功: ${result.value:.8f}")
+                        logger.log(level, "✅ 成功: $%.8f", result.value)
 
                         return result
                     else:
@@ -215,8 +402,7 @@ class BirdeyeClient:
                         error_msg = data.get("message", "API 返回空数据")
                         self.failed_requests += 1
 
-                        if verbose:
-                            print(f"    ❌ 失败: {error_msg}")
+                        logger.log(level, "❌ 失败: %s", error_msg)
 
                         return BirdeyePriceResult(success=False, error=error_msg)
 
@@ -230,10 +416,12 @@ class BirdeyeClient:
 
                 elif response.status == 429:
                     self.failed_requests += 1
-                    return BirdeyePriceResult(
-                        success=False,
-                        error="请求过于频繁，已触发速率限制 (429)"
-                    )
+                    self.rate_limiter.penalize(response.headers.get("Retry-After"))
+                    if not retry:
+                        return BirdeyePriceResult(
+                            success=False,
+                            error="请求过于频繁，已触发速率限制 (429)"
+                        )
 
                 else:
                     self.failed_requests += 1
@@ -251,6 +439,10 @@ class BirdeyeClient:
             self.failed_requests += 1
             return BirdeyePriceResult(success=False, error=f"异常: {str(e)}")
 
+        # 429 且允许重试：rate_limiter.acquire 会等待退避结束
+        logger.log(level, "[RateLimit] 429，退避后重试 %s... @ %s", address[:8], timestamp)
+        return await self._fetch_price_at_timestamp(address, timestamp, use_cache, verbose, retry=False)
+
     async def get_price_history(
         self,
         address: str,
@@ -269,28 +461,25 @@ class BirdeyeClient:
             time_from: 开始时间 (10位 Unix 时间戳)
             time_to: 结束时间 (10位 Unix 时间戳)
             interval: 时间间隔 (1m, 3m, 5m, 15m, 30m, 1H, 2H, 4H, 6H, 8H, 12H, 1D, 3D, 1W, 1M)
-            verbose: 是否输出详细日志
+            verbose: 是否以 INFO 级别记录详细日志 (否则为 DEBUG)
 
         Returns:
             价格历史列表 [{"unixTime": int, "value": float}, ...]
         """
         # 确保时间戳是 10 位
-        time_from = int(time_from)
-        time_to = int(time_to)
-        if time_from > 10000000000:
-            time_from = time_from // 1000
-        if time_to > 10000000000:
-            time_to = time_to // 1000
+        time_from = _to_seconds(time_from)
+        time_to = _to_seconds(time_to)
 
         await self._ensure_session()
         await self.rate_limiter.acquire()
 
         self.total_requests += 1
 
-        if verbose:
+        level = _log_level(verbose)
+        if logger.isEnabledFor(level):
             dt_from = datetime.fromtimestamp(time_from).strftime("%Y-%m-%d %H:%M:%S")
             dt_to = datetime.fromtimestamp(time_to).strftime("%Y-%m-%d %H:%M:%S")
-            print(f"  [Birdeye] 查询历史 {address[:8]}... | {dt_from} ~ {dt_to} | 间隔: {interval}")
+            logger.log(level, "[Birdeye] 查询历史 %s... | %s ~ %s | 间隔: %s", address[:8], dt_from, dt_to, interval)
 
         try:
             url = f"{self.BASE_URL}/defi/history_price"
@@ -301,39 +490,240 @@ class BirdeyeClient:
                 "time_from": time_from,
                 "time_to": time_to
             }
+            etag_key = (url, address, interval, time_from, time_to)
+            headers = self._conditional_headers(etag_key)
+
+            async with self.session.get(url, params=params, headers=headers, timeout=self._TIMEOUT_LONG) as response:
+                if response.status == 304 and etag_key in self._etag_cache:
+                    # 数据未变化，复用上次结果
+                    self.successful_requests += 1
+                    return self._etag_cache[etag_key][1]
 
-            async with self.session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=30)) as response:
                 if response.status == 200:
-                    data = await response.json()
+                    self.rate_limiter.reset_backoff()
+                    data = orjson.loads(await response.read())
 
                     if data.get("success") and data.get("data"):
                         items = data["data"].get("items", [])
                         self.successful_requests += 1
+                        self._store_validators(etag_key, response, items)
 
-                        if verbose:
-                            print(f"    ✅ 成功: 获取 {len(items)} 个价格点")
+                        logger.log(level, "✅ 成功: 获取 %d 个价格点", len(items))
 
                         return items
                     else:
                         self.failed_requests += 1
-                        if verbose:
-                            print(f"    ❌ 失败: API 返回空数据")
+                        logger.log(level, "❌ 失败: API 返回空数据")
                         return []
 
+                elif response.status == 429:
+                    self.failed_requests += 1
+                    self.rate_limiter.penalize(response.headers.get("Retry-After"))
+                    logger.log(level, "❌ 请求过于频繁，已触发速率限制 (429)")
+                    return []
+
                 else:
                     self.failed_requests += 1
-                    if verbose:
+                    if logger.isEnabledFor(level):
                         error_text = await response.text()
-                        print(f"    ❌ HTTP {response.status}: {error_text[:100]}")
+                        logger.log(level, "❌ HTTP %s: %s", response.status, error_text[:100])
                     return []
 
         except Exception as e:
             self.failed_requests += 1
-            if verbose:
-                print(f"    ❌ 异常: {e}")
+            logger.log(level, "❌ 异常: %s", e)
             return []
 
-    async def get_current_price(self, address: str, verbose: bool = False) -> BirdeyePriceResult:
+    async def get_prices_bulk(
+        self,
+        queries: List[Tuple[str, int]],
+        concurrency: int = 8,
+        use_cache: bool = True,
+        verbose: bool = False
+    ) -> List[BirdeyePriceResult]:
+        """
+        并发获取多个 (代币地址, 时间戳) 的价格
+
+        最多 concurrency 个请求同时在途，全局速率仍由 rate_limiter 控制，
+        网络往返与限速等待可以重叠。
+
+        Args:
+            queries: [(address, timestamp), ...]
+            concurrency: 最大并发请求数
+            use_cache: 是否使用缓存
+            verbose: 是否以 INFO 级别记录详细日志 (否则为 DEBUG)
+
+        Returns:
+            与 queries 顺序一致的 BirdeyePriceResult 列表
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch_one(address: str, timestamp: int) -> BirdeyePriceResult:
+            async with semaphore:
+                return await self._get_price_at_seconds(address, timestamp, use_cache, verbose)
+
+        # 时间戳只在入口统一转换一次
+        return await asyncio.gather(*(fetch_one(address, _to_seconds(timestamp)) for address, timestamp in queries))
+
+    async def get_prices_at_timestamps(
+        self,
+        address: str,
+        timestamps: List[int],
+        interval: str = "1m",
+        use_cache: bool = True,
+        verbose: bool = False
+    ) -> Dict[int, float]:
+        """
+        批量获取代币在多个时间戳的价格
+
+        用 /defi/history_price 范围查询代替 N 次 /defi/historical_price_unix 查询，
+        每个时间戳取范围内最近的价格点。
+
+        - 相近的时间戳合并为一个查询窗口，窗口跨度不超过单次返回上限 (_HISTORY_MAX_POINTS 个间隔)，
+          相距很远的时间戳分别查询，不会因为返回条数上限而被截断
+        - 最近的价格点与时间戳相差超过一个 interval 时不采用，改为单点查询 (get_prices_bulk)
+
+        Args:
+            address: 代币合约地址
+            timestamps: Unix 时间戳列表 (10位秒或13位毫秒)
+            interval: 价格点间隔 (同 get_price_history)
+            use_cache: 是否把返回的所有价格点写入价格缓存
+            verbose: 是否以 INFO 级别记录详细日志 (否则为 DEBUG)
+
+        Returns:
+            {请求的时间戳 (秒): USD 价格}，无数据的时间戳不包含在结果中
+        """
+        if not timestamps:
+            return {}
+
+        wanted = sorted({_to_seconds(ts) for ts in timestamps})
+        step = _INTERVAL_SECONDS.get(interval, 60)
+        # 两端各留一个 interval 的余量
+        span = (_HISTORY_MAX_POINTS - 3) * step
+
+        groups = [[wanted[0]]]
+        for ts in wanted[1:]:
+            if ts - groups[-1][0] > span:
+                groups.append([ts])
+            else:
+                groups[-1].append(ts)
+
+        prices: Dict[int, float] = {}
+        for chunk in await asyncio.gather(
+            *(self._prices_from_history(address, group, interval, step, use_cache, verbose) for group in groups)
+        ):
+            prices.update(chunk)
+
+        # 附近没有价格点的时间戳：逐个单点查询
+        missing = [ts for ts in wanted if ts not in prices]
+        if missing:
+            results = await self.get_prices_bulk(
+                [(address, ts) for ts in missing],
+                use_cache=use_cache,
+                verbose=verbose
+            )
+            for ts, result in zip(missing, results):
+                if result.success and result.value is not None:
+                    prices[ts] = result.value
+
+        return prices
+
+    async def _prices_from_history(
+        self,
+        address: str,
+        timestamps: List[int],
+        interval: str,
+        step: int,
+        use_cache: bool,
+        verbose: bool
+    ) -> Dict[int, float]:
+        """
+        一次范围查询覆盖一组已排序的时间戳 (秒)
+
+        Returns:
+            {时间戳: 价格}，只包含与最近价格点相差不超过 step 秒的时间戳
+        """
+        items = await self.get_price_history(
+            address,
+            timestamps[0] - step,
+            timestamps[-1] + step,
+            interval=interval,
+            verbose=verbose
+        )
+        times, values = _history_points(items)
+        if not times:
+            return {}
+
+        # 预填充缓存，之后对这些时间点的单点查询无需再请求
+        if use_cache:
+            await self._cache_history_points(address, times, values)
+
+        prices: Dict[int, float] = {}
+        last = len(times) - 1
+        for ts in timestamps:
+            i = bisect.bisect_left(times, ts)
+            # 取左右两个候选点中更近的一个
+            if i > last or (i > 0 and ts - times[i - 1] <= times[i] - ts):
+                i -= 1
+            if abs(times[i] - ts) <= step:
+                prices[ts] = values[i]
+
+        return prices
+
+    async def _cache_history_points(self, address: str, times: List[int], values: List[float]):
+        """把价格历史中的每个点写入内存缓存和磁盘缓存"""
+        for unix_time, value in zip(times, values):
+            self._price_cache[(address, unix_time)] = BirdeyePriceResult(
+                success=True,
+                value=value,
+                update_unix_time=unix_time
+            )
+        if self._disk_cache is not None:
+            self._disk_cache.put_many((address, t, v, t) for t, v in zip(times, values))
+            await self._maybe_flush_disk_cache()
+
+    async def prewarm(
+        self,
+        addresses: List[str],
+        time_from: int,
+        time_to: int,
+        interval: str = "1m",
+        verbose: bool = False
+    ) -> int:
+        """
+        预热价格缓存
+
+        研究流程开始时，对已知代币和时间窗口发出 /defi/history_price 查询，
+        提前填充价格缓存 (及磁盘缓存)，避免并发任务在遍历交易时重复查询。
+        时间窗口超过单次返回上限 (_HISTORY_MAX_POINTS 个间隔) 时拆分为多次查询。
+
+        Args:
+            addresses: 代币合约地址列表
+            time_from: 开始时间 (10位秒或13位毫秒)
+            time_to: 结束时间 (10位秒或13位毫秒)
+            interval: 价格点间隔 (同 get_price_history)
+            verbose: 是否以 INFO 级别记录详细日志 (否则为 DEBUG)
+
+        Returns:
+            写入缓存的价格点总数
+        """
+        step = _INTERVAL_SECONDS.get(interval, 60)
+        windows = _history_windows(_to_seconds(time_from), _to_seconds(time_to), step)
+
+        async def prewarm_one(address: str, window_from: int, window_to: int) -> int:
+            items = await self.get_price_history(address, window_from, window_to, interval=interval, verbose=verbose)
+            times, values = _history_points(items)
+            if not times:
+                return 0
+            await self._cache_history_points(address, times, values)
+            return len(times)
+
+        counts = await asyncio.gather(
+            *(prewarm_one(address, start, end) for address in addresses for start, end in windows)
+        )
+        return sum(counts)
+
+    async def get_current_price(self, address: str, verbose: bool = False, use_cache: bool = True) -> BirdeyePriceResult:
         """
         获取代币当前实时价格
 
@@ -341,26 +731,41 @@ class BirdeyeClient:
 
         Args:
             address: 代币合约地址
-            verbose: 是否输出详细日志
+            verbose: 是否以 INFO 级别记录详细日志 (否则为 DEBUG)
+            use_cache: 是否使用短期缓存 (30 秒)
 
         Returns:
             BirdeyePriceResult
         """
+        if use_cache:
+            cached = self._current_price_cache.get(address)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
+
+        return await self._single_flight(
+            address,
+            lambda: self._fetch_current_price(address, verbose, use_cache)
+        )
+
+    async def _fetch_current_price(self, address: str, verbose: bool, use_cache: bool) -> BirdeyePriceResult:
+        """请求 /defi/price (不检查缓存)"""
         await self._ensure_session()
         await self.rate_limiter.acquire()
 
         self.total_requests += 1
 
-        if verbose:
-            print(f"  [Birdeye] 查询当前价格 {address[:8]}...")
+        level = _log_level(verbose)
+        logger.log(level, "[Birdeye] 查询当前价格 %s...", address[:8])
 
         try:
             url = f"{self.BASE_URL}/defi/price"
             params = {"address": address}
 
-            async with self.session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=10)) as response:
+            async with self.session.get(url, params=params, headers=self._headers, timeout=self._TIMEOUT_SHORT) as response:
                 if response.status == 200:
-                    data = await response.json()
+                    self.rate_limiter.reset_backoff()
+                    data = orjson.loads(await response.read())
 
                     if data.get("success") and data.get("data"):
                         price_data = data["data"]
@@ -372,14 +777,21 @@ class BirdeyeClient:
                         )
                         self.successful_requests += 1
 
-                        if verbose:
-                            print(f"    ✅ 当前价格: ${result.value:.8f}")
+                        if use_cache:
+                            self._current_price_cache[address] = result
+
+                        logger.log(level, "✅ 当前价格: $%.8f", result.value)
 
                         return result
                     else:
                         self.failed_requests += 1
                         return BirdeyePriceResult(success=False, error="API 返回空数据")
 
+                elif response.status == 429:
+                    self.failed_requests += 1
+                    self.rate_limiter.penalize(response.headers.get("Retry-After"))
+                    return BirdeyePriceResult(success=False, error="请求过于频繁，已触发速率限制 (429)")
+
                 else:
                     self.failed_requests += 1
                     error_text = await response.text()
@@ -396,7 +808,7 @@ class BirdeyeClient:
         Args:
             timestamp: 10位 Unix 时间戳
             use_cache: 是否使用缓存
-            verbose: 是否输出详细日志
+            verbose: 是否以 INFO 级别记录详细日志 (否则为 DEBUG)
 
         Returns:
             BirdeyePriceResult
@@ -430,6 +842,7 @@ class BirdeyeClient:
     def clear_cache(self):
         """清除价格缓存"""
         self._price_cache.clear()
+        self._current_price_cache.clear()
         self.cache_hits = 0
 
     async def get_ohlcv(
@@ -450,28 +863,25 @@ class BirdeyeClient:
             time_from: 开始时间 (10位 Unix 时间戳)
             time_to: 结束时间 (10位 Unix 时间戳)
             interval: 时间间隔 (1m, 3m, 5m, 15m, 30m, 1H, 2H, 4H, 6H, 8H, 12H, 1D, 3D, 1W, 1M)
-            verbose: 是否输出详细日志
+            verbose: 是否以 INFO 级别记录详细日志 (否则为 DEBUG)
 
         Returns:
             OHLCV 数据列表 [{"o": open, "h": high, "l": low, "c": close, "v": volume, "unixTime": int}, ...]
         """
         # 确保时间戳是 10 位
-        time_from = int(time_from)
-        time_to = int(time_to)
-        if time_from > 10000000000:
-            time_from = time_from // 1000
-        if time_to > 10000000000:
-            time_to = time_to // 1000
+        time_from = _to_seconds(time_from)
+        time_to = _to_seconds(time_to)
 
         await self._ensure_session()
         await self.rate_limiter.acquire()
 
         self.total_requests += 1
 
-        if verbose:
+        level = _log_level(verbose)
+        if logger.isEnabledFor(level):
             dt_from = datetime.fromtimestamp(time_from).strftime("%Y-%m-%d %H:%M:%S")
             dt_to = datetime.fromtimestamp(time_to).strftime("%Y-%m-%d %H:%M:%S")
-            print(f"  [Birdeye] OHLCV {address[:8]}... | {dt_from} ~ {dt_to} | {interval}")
+            logger.log(level, "[Birdeye] OHLCV %s... | %s ~ %s | %s", address[:8], dt_from, dt_to, interval)
 
         try:
             url = f"{self.BASE_URL}/defi/ohlcv"
@@ -481,39 +891,72 @@ class BirdeyeClient:
                 "time_from": time_from,
                 "time_to": time_to
             }
+            etag_key = (url, address, interval, time_from, time_to)
+            headers = self._conditional_headers(etag_key)
+
+            async with self.session.get(url, params=params, headers=headers, timeout=self._TIMEOUT_LONG) as response:
+                if response.status == 304 and etag_key in self._etag_cache:
+                    # 数据未变化，复用上次结果
+                    self.successful_requests += 1
+                    return self._etag_cache[etag_key][1]
 
-            async with self.session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=30)) as response:
                 if response.status == 200:
-                    data = await response.json()
+                    self.rate_limiter.reset_backoff()
+                    data = orjson.loads(await response.read())
 
                     if data.get("success") and data.get("data"):
                         items = data["data"].get("items", [])
                         self.successful_requests += 1
+                        self._store_validators(etag_key, response, items)
 
-                        if verbose:
-                            print(f"    OK: {len(items)} candles")
-                            # DEBUG: 打印前3条原始数据
-                            if items:
-                                print(f"    [RAW] First item: {items[0]}")
-                                if len(items) > 1:
-                                    print(f"    [RAW] Second item: {items[1]}")
+                        logger.log(level, "OK: %d candles", len(items))
+                        # DEBUG: 记录前2条原始数据
+                        if items:
+                            logger.debug("[RAW] First item: %s", items[0])
+                            if len(items) > 1:
+                                logger.debug("[RAW] Second item: %s", items[1])
 
                         return items
                     else:
                         self.failed_requests += 1
-                        if verbose:
-                            print(f"    FAILED: Empty data")
+                        logger.log(level, "FAILED: Empty data")
                         return []
 
+                elif response.status == 429:
+                    self.failed_requests += 1
+                    self.rate_limiter.penalize(response.headers.get("Retry-After"))
+                    logger.log(level, "Rate limited (429)")
+                    return []
+
                 else:
                     self.failed_requests += 1
-                    if verbose:
+                    if logger.isEnabledFor(level):
                         error_text = await response.text()
-                        print(f"    HTTP {response.status}: {error_text[:100]}")
+                        logger.log(level, "HTTP %s: %s", response.status, error_text[:100])
                     return []
 
         except Exception as e:
             self.failed_requests += 1
-            if verbose:
-                print(f"    Exception: {e}")
+            logger.log(level, "Exception: %s", e)
             return []
+
+    async def get_ohlcv_array(
+        self,
+        address: str,
+        time_from: int,
+        time_to: int,
+        interval: str = "1m",
+        verbose: bool = False
+    ) -> np.ndarray:
+        """
+        获取代币 OHLCV K线数据 (NumPy 结构化数组)
+
+        与 get_ohlcv 相同，但直接返回 OHLCV_DTYPE 结构化数组，
+        下游分析 (归一化、PnL 计算) 可按列处理，无需再遍历 dict 列表。
+
+        Returns:
+            shape=(n,) 的结构化数组，字段 t, o, h, l, c, v；无数据时为空数组。
+            缺失或为 null 的字段记为 0
+        """
+        items = await self.get_ohlcv(address, time_from, time_to, interval, verbose)
+        return _ohlcv_to_array(items)
@@ -0,0 +1,137 @@
+"""
+历史价格持久化缓存 (SQLite)
+
+历史时间点的价格不会变化，持久化到磁盘后，重新运行研究流程时无需再次请求 API。
+作为 BirdeyeClient 内存缓存之后的第二级缓存：内存 → 磁盘 → 网络。
+
+写入先进入内存缓冲区，累积到 flush_size 条后批量 executemany 写入，
+避免每次请求都同步写盘。读取使用单独的连接 (WAL 模式下读不会被写阻塞)，
+线程池中的批量写入不会卡住事件循环上的查询。
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+import weakref
+from typing import Optional, List, Tuple, Iterable
+
+
+# 尚未关闭的 PriceStore，进程退出时把缓冲区落盘
+_open_stores: "weakref.WeakSet[PriceStore]" = weakref.WeakSet()
+
+
+class PriceStore:
+    """
+    SQLite 历史价格存储
+
+    表结构: prices(address, ts, value, update_unix_time)，主键 (address, ts)
+    """
+
+    def __init__(self, path: str, flush_size: int = 500):
+        """
+        Args:
+            path: SQLite 数据库文件路径
+            flush_size: 缓冲区累积多少条后批量写盘
+        """
+        self.path = path
+        self.flush_size = flush_size
+
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+
+        # flush 可能在线程池中执行，连接需允许跨线程使用 (由 _lock 串行化)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS prices ("
+            "address TEXT NOT NULL, "
+            "ts INTEGER NOT NULL, "
+            "value REAL NOT NULL, "
+            "update_unix_time INTEGER, "
+            "PRIMARY KEY (address, ts)"
+            ") WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+        # 只读连接：查询不与 flush 争用同一个连接/锁
+        self._read_conn = sqlite3.connect(path, check_same_thread=False)
+
+        self._lock = threading.Lock()           # 串行化写连接
+        self._read_lock = threading.Lock()      # 串行化读连接
+        self._pending_lock = threading.Lock()   # 只保护缓冲区，持有时间极短
+        self._pending: List[Tuple[str, int, float, Optional[int]]] = []
+        self._closed = False
+
+        _open_stores.add(self)
+
+    @property
+    def pending(self) -> int:
+        """尚未写盘的条数"""
+        return len(self._pending)
+
+    def get(self, address: str, ts: int) -> Optional[Tuple[float, Optional[int]]]:
+        """
+        查询价格
+
+        Returns:
+            (value, update_unix_time)，不存在时返回 None
+        """
+        with self._read_lock:
+            row = self._read_conn.execute(
+                "SELECT value, update_unix_time FROM prices WHERE address = ? AND ts = ?",
+                (address, ts)
+            ).fetchone()
+        return row
+
+    def put(self, address: str, ts: int, value: float, update_unix_time: Optional[int] = None):
+        """写入缓冲区 (调用 flush 后落盘)"""
+        with self._pending_lock:
+            self._pending.append((address, ts, value, update_unix_time))
+
+    def put_many(self, rows: Iterable[Tuple[str, int, float, Optional[int]]]):
+        """批量写入缓冲区"""
+        with self._pending_lock:
+            self._pending.extend(rows)
+
+    def flush(self):
+        """把缓冲区批量写入磁盘"""
+        with self._pending_lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return
+
+        with self._lock:
+            if self._closed:
+                return
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO prices (address, ts, value, update_unix_time) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def close(self):
+        """写入剩余数据并关闭连接 (重复调用无副作用)"""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        with self._lock:
+            self._conn.close()
+        with self._read_lock:
+            self._read_conn.close()
+        _open_stores.discard(self)
+
+
+def _close_stores_at_exit():
+    """进程退出时的兜底：未调用 close 的 PriceStore 也不会丢失缓冲区中的数据"""
+    for store in list(_open_stores):
+        try:
+            store.close()
+        except sqlite3.Error:
+            pass
+
+
+atexit.register(_close_stores_at_exit)
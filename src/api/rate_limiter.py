@@ -0,0 +1,125 @@
+"""
+速率限制器 (令牌桶)
+Birdeye / Solscan 客户端共用
+"""
+
+import asyncio
+import logging
+import math
+import random
+import time
+from typing import Optional, Union
+
+
+logger = logging.getLogger(__name__)
+
+_NS = 1_000_000_000
+# 一个令牌 = 60 * 10^9 个单位，每纳秒补充 max_per_minute 个单位 (即每分钟 max_per_minute 个令牌)
+_TOKEN = 60 * _NS
+
+# 429 退避上限 (秒) 与随机抖动上限 (纳秒)
+_MAX_BACKOFF = 60
+_MAX_JITTER_NS = 500_000_000
+
+
+class RateLimiter:
+    """
+    速率限制器 - 防止触发 API 限制
+
+    令牌桶实现：每次 acquire 为 O(1)，不维护请求时间列表。
+    - 桶容量 max_per_minute，按 max_per_minute / 60 每秒匀速补充
+    - 令牌不足时记为欠账，按欠账等待补充时间
+    - 另外保证相邻请求之间至少间隔 min_interval 秒
+    - 锁只保护令牌记账 (预约发送时间)，等待在锁外进行，并发请求的等待可以重叠
+    - 收到 429 时调用 penalize()，所有后续请求一起退避 (指数退避 + 随机抖动)
+
+    Birdeye Starter 版 ($99/月):
+    - 15 rps (每秒15个请求)
+    - 5M CUs/月
+    """
+
+    def __init__(self, max_per_minute: int = 800, min_interval: float = 0.08):
+        """
+        Args:
+            max_per_minute: 每分钟最大请求数 (Starter版 15rps=900/min, 建议800)
+            min_interval: 请求之间最小间隔秒数 (Starter版建议 0.08)
+        """
+        self.max_per_minute = max_per_minute
+        self.min_interval = min_interval
+
+        # 全部使用 monotonic_ns 整数运算 (monotonic 不受 NTP 校时影响，整数无精度漂移)
+        # 令牌以 _TOKEN 为单位计量：每纳秒恰好补充 max_per_minute 个单位
+        self.capacity = max_per_minute * _TOKEN
+        self.tokens: int = self.capacity
+        self.last_refill_ns: int = time.monotonic_ns()
+        self.interval_ns: int = int(min_interval * _NS)
+        self.next_ok_ns: int = 0                    # 下一个请求最早可发出的时间
+
+        # 429 退避状态
+        self._penalty_until_ns: int = 0             # 退避结束前不发出任何请求
+        self._strikes: int = 0                      # 连续退避次数 (一次退避期间的多个 429 只计一次)
+
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """获取请求许可"""
+        async with self.lock:
+            now = time.monotonic_ns()
+
+            # 补充令牌
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill_ns) * self.max_per_minute)
+            self.last_refill_ns = now
+
+            # 消耗一个令牌 (不足时为负数，表示需要等待补充；向上取整到纳秒)
+            self.tokens -= _TOKEN
+            wait_ns = -(self.tokens // self.max_per_minute) if self.tokens < 0 else 0
+            if wait_ns > _NS:
+                logger.warning("[RateLimit] 达到每分钟限制，等待 %.1f 秒...", wait_ns / _NS)
+
+            # 确保请求间隔
+            start = max(self.next_ok_ns, now + wait_ns, self._penalty_until_ns)
+            self.next_ok_ns = start + self.interval_ns
+
+        if start > now:
+            await asyncio.sleep((start - now) / _NS)
+
+    def penalize(self, retry_after: Optional[Union[str, float]] = None):
+        """
+        触发全局退避 (收到 429 时调用)
+
+        退避时间 = max(Retry-After, 2^(连续退避次数-1)) 秒 (上限 60 秒) + 0~0.5 秒随机抖动，
+        抖动避免所有协程在同一时刻恢复请求。
+
+        退避期间收到的 429 (通常是退避前已发出的并发请求) 属于同一次退避，
+        只按各自的 Retry-After 延长退避，不增加连续退避次数。
+
+        Args:
+            retry_after: 响应头 Retry-After 的值 (秒)，无法解析或非有限值 (nan/inf) 时按 1 秒处理
+        """
+        try:
+            retry_after_s = float(retry_after) if retry_after is not None else 1.0
+        except (TypeError, ValueError):
+            # Retry-After 也可能是 HTTP 日期格式
+            retry_after_s = 1.0
+        if not math.isfinite(retry_after_s):
+            retry_after_s = 1.0
+
+        now = time.monotonic_ns()
+        new_episode = now >= self._penalty_until_ns
+        if new_episode:
+            self._strikes += 1
+
+        backoff_s = min(max(retry_after_s, 2 ** (self._strikes - 1)), _MAX_BACKOFF)
+        until = now + int(backoff_s * _NS) + random.randint(0, _MAX_JITTER_NS)
+        self._penalty_until_ns = max(self._penalty_until_ns, until)
+        if new_episode:
+            logger.warning("[RateLimit] 收到 429，全局退避 %.1f 秒", backoff_s)
+
+    def reset_backoff(self):
+        """
+        请求成功后重置连续退避次数
+
+        退避期间返回的成功响应来自退避前发出的请求，不代表限流已解除，忽略。
+        """
+        if time.monotonic_ns() >= self._penalty_until_ns:
+            self._strikes = 0
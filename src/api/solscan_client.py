@@ -5,15 +5,22 @@ Solscan Pro API 客户端
 
 import asyncio
 import aiohttp
-import time
-from typing import Optional, Dict, List, Any
+import logging
+import orjson
+from typing import Optional, Dict, Any
 from dataclasses import dataclass
 from datetime import datetime
 
+from ._http import _get_shared_session, _log_level
+from .rate_limiter import RateLimiter
 
-@dataclass
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True, frozen=True)
 class SolscanPriceResult:
-    """Solscan 价格查询结果"""
+    """Solscan 价格查询结果 (不可变，使用 __slots__)"""
     success: bool
     value: Optional[float] = None
     timestamp: Optional[int] = None
@@ -31,6 +38,9 @@ class SolscanClient:
     BASE_URL = "https://pro-api.solscan.io/v2.0"
     SOL_MINT = "So11111111111111111111111111111111111111112"
 
+    # 请求超时 (类级常量，避免每次请求重新构造 ClientTimeout)
+    _TIMEOUT_DEFAULT = aiohttp.ClientTimeout(total=15)
+
     def __init__(self, api_token: str, requests_per_minute: int = 1000):
         """
         初始化 Solscan 客户端
@@ -41,9 +51,16 @@ class SolscanClient:
         """
         self.api_token = api_token
         self.session: Optional[aiohttp.ClientSession] = None
+        self._headers = {
+            "token": api_token,
+            "accept": "application/json"
+        }
         self.requests_per_minute = requests_per_minute
-        self.request_times: List[float] = []
-        self.lock = asyncio.Lock()
+        # 平滑请求：最小间隔 = 60 / 每分钟请求数
+        self.rate_limiter = RateLimiter(
+            max_per_minute=requests_per_minute,
+            min_interval=60.0 / requests_per_minute
+        )
 
         # 统计
         self.total_requests = 0
@@ -51,39 +68,21 @@ class SolscanClient:
         self.failed_requests = 0
 
     async def _ensure_session(self):
-        """确保 session 已初始化"""
-        if self.session is None or self.session.closed:
-            headers = {
-                "token": self.api_token,
-                "accept": "application/json"
-            }
-            self.session = aiohttp.ClientSession(headers=headers)
+        """
+        获取当前事件循环的进程级共享 session
+
+        每次请求前都重新获取 (不缓存判断)，客户端跨多个 asyncio.run 复用时
+        不会拿到已关闭事件循环上的 session。
+        """
+        self.session = _get_shared_session()
 
     async def close(self):
-        """关闭 session"""
-        if self.session and not self.session.closed:
-            await self.session.close()
+        """释放 session 引用 (共享 session 由 _http 模块统一关闭)"""
+        self.session = None
 
     async def _rate_limit(self):
         """速率限制"""
-        async with self.lock:
-            now = time.time()
-            self.request_times = [t for t in self.request_times if now - t < 60]
-
-            if len(self.request_times) >= self.requests_per_minute:
-                sleep_time = 60 - (now - self.request_times[0])
-                if sleep_time > 0:
-                    await asyncio.sleep(sleep_time)
-                    self.request_times = []
-
-            # 平滑请求
-            min_interval = 60.0 / self.requests_per_minute
-            if self.request_times:
-                time_since_last = now - self.request_times[-1]
-                if time_since_last < min_interval:
-                    await asyncio.sleep(min_interval - time_since_last)
-
-            self.request_times.append(time.time())
+        await self.rate_limiter.acquire()
 
     async def get_token_price(
         self,
@@ -95,11 +94,15 @@ class SolscanClient:
         """
         获取代币在指定时间范围的价格
 
+        使用 /v2.0/token/price 端点，响应格式固定为：
+            {"success": true, "data": [{"date": 20240101, "price": 1.23}, ...]}
+        取 data[0].price 作为价格。
+
         Args:
             address: 代币地址
             from_time: 开始时间 (Unix 时间戳)
             to_time: 结束时间 (默认 from_time + 1)
-            verbose: 是否输出详细日志
+            verbose: 是否以 INFO 级别记录详细日志 (否则为 DEBUG)
 
         Returns:
             SolscanPriceResult
@@ -112,9 +115,10 @@ class SolscanClient:
         if to_time is None:
             to_time = from_time + 1
 
-        if verbose:
+        level = _log_level(verbose)
+        if logger.isEnabledFor(level):
             dt = datetime.fromtimestamp(from_time).strftime("%Y-%m-%d %H:%M:%S")
-            print(f"  [Solscan] 查询 {address[:8]}... @ {from_time} ({dt})")
+            logger.log(level, "[Solscan] 查询 %s... @ %s (%s)", address[:8], from_time, dt)
 
         try:
             url = f"{self.BASE_URL}/token/price"
@@ -124,31 +128,18 @@ class SolscanClient:
                 "to_time": to_time
             }
 
-            async with self.session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=15)) as response:
+            async with self.session.get(url, params=params, headers=self._headers, timeout=self._TIMEOUT_DEFAULT) as response:
                 if response.status == 200:
-                    data = await response.json()
-
-                    # 尝试多种响应格式
-                    price = None
-
-                    if isinstance(data, dict):
-                        if "price" in data:
-                            price = data.get("price")
-                        elif "data" in data:
-                            data_obj = data.get("data")
-                            if isinstance(data_obj, dict):
-                                price = data_obj.get("price")
-                            elif isinstance(data_obj, list) and len(data_obj) > 0:
-                                price = data_obj[0].get("price")
-                        elif data.get("success") and data.get("data"):
-                            items = data.get("data", [])
-                            if isinstance(items, list) and len(items) > 0:
-                                price = items[0].get("price") or items[0].get("value")
+                    data = orjson.loads(await response.read())
+
+                    try:
+                        price = data["data"][0]["price"]
+                    except (KeyError, IndexError, TypeError):
+                        price = None
 
                     if price is not None:
                         self.successful_requests += 1
-                        if verbose:
-                            print(f"    ✅ 成功: ${float(price):.8f}")
+                        logger.log(level, "✅ 成功: $%.8f", float(price))
                         return SolscanPriceResult(
                             success=True,
                             value=float(price),
@@ -156,8 +147,7 @@ class SolscanClient:
                         )
                     else:
                         self.failed_requests += 1
-                        if verbose:
-                            print(f"    ❌ 响应中未找到价格字段")
+                        logger.log(level, "❌ 响应中未找到价格字段")
                         return SolscanPriceResult(
                             success=False,
                             error="API 响应中未找到价格数据"
@@ -9,63 +9,286 @@ Key Features:
 - atomic_load(): Safe JSON loading with error handling
 - normalize_price(): Divide raw price by 10^decimals
 - KLineNormalizer: Batch normalize OHLCV data from Birdeye
+- K-line cache stored column-wise (SoA, format "soa-v1"), optionally zstd-compressed
+- normalize_helius_transfers_batch(): Column-wise Helius transfer normalization
 """
 
 import os
 import sys
 import json
 import time
+import hashlib
 import tempfile
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass
+from operator import attrgetter, itemgetter
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # stdlib json fallback (slower)
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # only needed for compressed (.zst) caches
+    zstandard = None
 
 # Add parent to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.resolve()))
 from init_dirs import CHART_LIBRARY_DIR, get_kline_path
 
 
+# =============================================================================
+# JSON Encoding (orjson when available, stdlib json otherwise)
+# =============================================================================
+
+def _json_default(obj: Any) -> Any:
+    """Convert NumPy values (stdlib encoder only) and records with to_dict() (e.g. KLineBar, TradeRecord)."""
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    to_dict = getattr(obj, "to_dict", None)
+    if callable(to_dict):
+        return to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _dumps(data: Any, indent: int = 2) -> bytes:
+    """Serialize data to UTF-8 JSON bytes."""
+    if orjson is not None:
+        # Dataclasses go through to_dict() so both encoders emit the same JSON
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_json_default, option=option)
+    return json.dumps(data, indent=indent or None, ensure_ascii=False, default=_json_default).encode("utf-8")
+
+
+def _loads(raw: bytes) -> Any:
+    """Parse UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+# =============================================================================
+# Compression (zstd, selected by the ".zst" file suffix)
+# =============================================================================
+
+ZSTD_SUFFIX = ".zst"
+ZSTD_LEVEL = 3
+
+_DECODE_ERRORS = (json.JSONDecodeError, IOError) + ((zstandard.ZstdError,) if zstandard else ())
+
+
+def _require_zstandard(path: Path) -> None:
+    if zstandard is None:
+        raise IOError(f"zstandard is not installed, cannot handle {path.name}")
+
+
+def _encode(payload: bytes, path: Path) -> bytes:
+    """Compress payload if path is a .zst file."""
+    if path.suffix != ZSTD_SUFFIX:
+        return payload
+    _require_zstandard(path)
+    # One-shot compress records the content size in the frame header
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+
+
+def _decode(raw: bytes, path: Path) -> bytes:
+    """Decompress raw file bytes if path is a .zst file."""
+    if path.suffix != ZSTD_SUFFIX:
+        return raw
+    _require_zstandard(path)
+    return zstandard.ZstdDecompressor().decompress(raw)
+
+
 # =============================================================================
 # Atomic File Operations
 # =============================================================================
 
-def atomic_save(path: Union[str, Path], data: Any, indent: int = 2) -> bool:
+def _fsync_dir(directory: Path) -> None:
+    """fsync a directory so a rename inside it survives a crash (no-op where unsupported)."""
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # e.g. Windows cannot open directories
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+class StalePreconditionError(IOError):
+    """
+    Raised by atomic_save when expected_prev_sha256 no longer matches the target.
+
+    Another writer replaced the file since it was read: reload, re-apply the
+    change and save again with the new hash.
+    """
+
+
+class WriteCorruptionError(IOError):
+    """
+    Raised by atomic_save(journal=True) when the temp file read back does not
+    match the serialized data (nothing is written).
+    """
+
+
+# Opt-in audit journal (atomic_save(journal=True)), kept next to the target file
+JOURNAL_DIR_NAME = ".resilient_write"
+JOURNAL_FILE_NAME = "journal.jsonl"
+
+
+def file_sha256(path: Union[str, Path]) -> str:
+    """
+    SHA-256 hex digest of a file's current contents.
+
+    Returns "" if the file does not exist, so the result can always be passed
+    back as atomic_save(expected_prev_sha256=...).
+    """
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return ""
+
+
+def _append_journal(path: Path, sha256: str, size: int) -> None:
+    """Append one audit row for a journaled write (failures are reported, not raised)."""
+    journal_dir = path.parent / JOURNAL_DIR_NAME
+    row = {"ts": time.time(), "path": str(path), "sha256": sha256, "bytes": size}
+    try:
+        journal_dir.mkdir(exist_ok=True)
+        with open(journal_dir / JOURNAL_FILE_NAME, "ab") as f:
+            f.write(_dumps(row, indent=0) + b"\n")
+    except OSError as e:
+        print(f"[atomic_save] Could not append journal for {path}: {e}")
+
+
+def atomic_save(
+    path: Union[str, Path],
+    data: Any,
+    indent: int = 2,
+    durable: bool = False,
+    expected_prev_sha256: Optional[str] = None,
+    single_writer: bool = False,
+    journal: bool = False
+) -> bool:
     """
     Atomically save data to JSON file using write-then-replace pattern.
 
     This prevents file corruption if the UI reads during a write operation.
     Data is written to a temp file, then atomically moved to the target path.
+    Serialization uses orjson (stdlib json if orjson is not installed).
+    Paths ending in ".zst" are zstd-compressed (requires zstandard).
+
+    By default the write is rename-atomic but NOT fsync-durable: readers never
+    see a partial file, but a power loss right after the call may lose the
+    update. That is the right trade-off for reconstructible caches (e.g. K-lines
+    re-fetchable from Birdeye) and is much faster. Pass durable=True to fsync
+    the file and its parent directory.
 
     Args:
         path: Target file path
-        data: JSON-serializable data
-        indent: JSON indentation (default: 2)
+        data: JSON-serializable data (NumPy arrays and non-str dict keys allowed)
+        indent: JSON indentation (orjson supports 2 only; 0 = compact)
+        durable: fsync the temp file before the rename and the parent
+                 directory after it (default: False)
+        expected_prev_sha256: Optimistic-concurrency guard. When given, the
+                 rename is refused if the target's current hash (file_sha256,
+                 "" = absent) differs (StalePreconditionError). The
+                 check-then-rename is best-effort, not a lock.
+        single_writer: Write through a fixed ".<stem>_.tmp" next to the target
+                 (O_CREAT|O_TRUNC) instead of a random mkstemp name. Only safe
+                 when a single process/thread writes this path, e.g. a sync
+                 loop re-saving the same K-line file (default: False)
+        journal: Read the temp file back and hash-verify it before the rename
+                 (WriteCorruptionError on mismatch), then append a row to
+                 .resilient_write/journal.jsonl. The journal is never trimmed,
+                 so keep this for rare audited writes, not hot save loops
+                 (default: False)
 
     Returns:
         True if successful, False on error
 
+    Raises:
+        StalePreconditionError: expected_prev_sha256 was given and the target
+            changed since it was read (nothing is written)
+        WriteCorruptionError: journal=True and the temp file did not read back
+            as written (nothing is written)
+
     Example:
         >>> atomic_save("/data/klines.json", [[1234567890, 1.0, 1.1, 0.9, 1.05, 1000]])
     """
     path = Path(path)
+    return _atomic_save_to(
+        path, path.parent, f".{path.stem}_", data,
+        indent=indent,
+        durable=durable,
+        expected_prev_sha256=expected_prev_sha256,
+        single_writer=single_writer,
+        journal=journal
+    )
 
+
+def _atomic_save_to(
+    path: Path,
+    parent: Path,
+    tmp_prefix: str,
+    data: Any,
+    indent: int = 2,
+    durable: bool = False,
+    expected_prev_sha256: Optional[str] = None,
+    single_writer: bool = False,
+    journal: bool = False
+) -> bool:
+    """
+    atomic_save with the target's parent directory and temp-file prefix
+    precomputed, for callers that save the same path repeatedly.
+    """
     try:
         # Ensure parent directory exists
-        path.parent.mkdir(parents=True, exist_ok=True)
+        parent.mkdir(parents=True, exist_ok=True)
 
         # Write to temp file in same directory (same filesystem for atomic rename)
-        fd, temp_path = tempfile.mkstemp(
-            dir=path.parent,
-            prefix=f".{path.stem}_",
-            suffix=".tmp"
-        )
+        if single_writer:
+            temp_path = parent / f"{tmp_prefix}.tmp"
+            # Same permissions as mkstemp creates, so the result doesn't depend on the flag
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        else:
+            fd, temp_path = tempfile.mkstemp(
+                dir=parent,
+                prefix=tmp_prefix,
+                suffix=".tmp"
+            )
 
         try:
-            with os.fdopen(fd, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=indent, ensure_ascii=False)
+            payload = _encode(_dumps(data, indent), path)
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+                if durable:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            if journal:
+                digest = hashlib.sha256(payload).hexdigest()
+                if file_sha256(temp_path) != digest:
+                    raise WriteCorruptionError(f"write_corruption: temp file for {path} does not match serialized data")
+            if expected_prev_sha256 is not None and file_sha256(path) != expected_prev_sha256:
+                raise StalePreconditionError(f"{path} changed since it was read")
 
             # Atomic replace (POSIX guarantees atomicity for os.replace)
             os.replace(temp_path, path)
+
+            if durable:
+                # Persist the directory entry of the rename as well
+                _fsync_dir(parent)
+
+            if journal:
+                _append_journal(path, digest, len(payload))
             return True
 
         except Exception:
@@ -74,6 +297,9 @@ def atomic_save(path: Union[str, Path], data: Any, indent: int = 2) -> bool:
                 os.unlink(temp_path)
             raise
 
+    except (StalePreconditionError, WriteCorruptionError):
+        raise
+
     except Exception as e:
         print(f"[atomic_save] Error saving {path}: {e}")
         return False
@@ -81,7 +307,7 @@ def atomic_save(path: Union[str, Path], data: Any, indent: int = 2) -> bool:
 
 def atomic_load(path: Union[str, Path], default: Any = None) -> Any:
     """
-    Safely load JSON data from file.
+    Safely load JSON data from file (zstd-decompressed if the path ends in ".zst").
 
     Args:
         path: File path to load
@@ -96,13 +322,41 @@ def atomic_load(path: Union[str, Path], default: Any = None) -> Any:
         return default
 
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError) as e:
+        return _loads(_decode(path.read_bytes(), path))
+    except _DECODE_ERRORS as e:  # orjson.JSONDecodeError subclasses json's
         print(f"[atomic_load] Error loading {path}: {e}")
         return default
 
 
+
+def atomic_load_with_sha256(path: Union[str, Path], default: Any = None) -> Tuple[Any, str]:
+    """
+    Like atomic_load, but also return the SHA-256 of the bytes read.
+
+    The hash ("" if the file does not exist) is what atomic_save's
+    expected_prev_sha256 expects, for read-modify-write without a second read.
+
+    Returns:
+        (parsed data or default, sha256 hex digest)
+    """
+    path = Path(path)
+
+    try:
+        raw = path.read_bytes()
+    except FileNotFoundError:
+        return default, ""
+    except IOError as e:
+        print(f"[atomic_load] Error loading {path}: {e}")
+        return default, ""
+
+    sha256 = hashlib.sha256(raw).hexdigest()
+    try:
+        return _loads(_decode(raw, path)), sha256
+    except _DECODE_ERRORS as e:
+        print(f"[atomic_load] Error loading {path}: {e}")
+        return default, sha256
+
+
 # =============================================================================
 # Price Normalization
 # =============================================================================
@@ -149,9 +403,31 @@ def normalize_amount(raw_amount: Union[int, float], decimals: int) -> float:
 # K-Line Data Structures
 # =============================================================================
 
-@dataclass
+def price_divisor(decimals: int) -> int:
+    """Price divisor for token decimals (1 = already normalized)."""
+    return 10 ** decimals if decimals > 0 else 1
+
+
+# Birdeye OHLCV item keys, in KLineBar field order
+BIRDEYE_OHLCV_KEYS = ("unixTime", "o", "h", "l", "c", "v")
+
+# C-implemented lookups (no per-key .get() call on the hot path)
+_BE_GET = itemgetter(*BIRDEYE_OHLCV_KEYS)
+_BE_COLUMN_GETTERS = tuple(itemgetter(key) for key in BIRDEYE_OHLCV_KEYS)
+
+
+def _with_birdeye_defaults(items: List[Dict]) -> List[Dict]:
+    """One-time schema pass: fill missing OHLCV keys with 0 (only used when a key is missing)."""
+    return [{key: item.get(key, 0) for key in BIRDEYE_OHLCV_KEYS} for item in items]
+
+
+@dataclass(slots=True)
 class KLineBar:
-    """Single K-line bar with OHLCV data."""
+    """
+    Single K-line bar with OHLCV data.
+
+    Uses __slots__: no per-bar __dict__, roughly half the memory of a dict row.
+    """
     timestamp: int      # Unix timestamp (seconds)
     open: float
     high: float
@@ -192,18 +468,186 @@ class KLineBar:
             item: Birdeye OHLCV item
             decimals: Token decimals for normalization (0 = already normalized)
         """
-        divisor = 10 ** decimals if decimals > 0 else 1
+        return cls.from_birdeye_with_divisor(item, price_divisor(decimals))
+
+    @classmethod
+    def from_birdeye_with_divisor(cls, item: Dict, divisor: float) -> "KLineBar":
+        """
+        Create from Birdeye API response item with a precomputed price divisor.
+
+        Use this when converting many items with the same decimals, so
+        10 ** decimals is computed once instead of per item.
+
+        Args:
+            item: Birdeye OHLCV item
+            divisor: Price divisor from price_divisor(decimals)
+        """
+        try:
+            ts, o, h, l, c, v = _BE_GET(item)
+        except KeyError:
+            ts, o, h, l, c, v = _BE_GET(_with_birdeye_defaults([item])[0])
 
         return cls(
-            timestamp=item.get("unixTime", 0),
-            open=item.get("o", 0) / divisor,
-            high=item.get("h", 0) / divisor,
-            low=item.get("l", 0) / divisor,
-            close=item.get("c", 0) / divisor,
-            volume=item.get("v", 0)
+            timestamp=ts,
+            open=o / divisor,
+            high=h / divisor,
+            low=l / divisor,
+            close=c / divisor,
+            volume=v
         )
 
 
+def _birdeye_columns(items: List[Dict]) -> tuple:
+    """
+    Extract Birdeye OHLCV items into columns: int64 unixTime, float64 o/h/l/c/v.
+
+    Raises KeyError if an item lacks a key (see _with_birdeye_defaults).
+    """
+    n = len(items)
+    ts_get, *value_gets = _BE_COLUMN_GETTERS
+    ts = np.fromiter(map(ts_get, items), dtype=np.int64, count=n)
+    values = [np.fromiter(map(get, items), dtype=np.float64, count=n) for get in value_gets]
+    return (ts, *values)
+
+
+def _normalize_ohlcv(
+    ts: np.ndarray,
+    o: np.ndarray,
+    h: np.ndarray,
+    l: np.ndarray,
+    c: np.ndarray,
+    v: np.ndarray,
+    divisor: float
+) -> tuple:
+    """
+    Numeric kernel of KLineNormalizer.
+
+    Args:
+        ts: int64 unixTime column (seconds)
+        o, h, l, c, v: float64 OHLCV columns
+        divisor: Price divisor (10^decimals, 1 = already normalized)
+
+    Returns:
+        (ts, o, h, l, c, v) sorted by timestamp ascending (stable, same
+        order as list.sort), with O/H/L/C divided by divisor. Timestamps stay in
+        seconds (KLineBar units) and volume is left as-is.
+
+    Note: the input columns may be modified in place.
+    """
+    # Birdeye already returns bars in ascending order; skip the gather when it does
+    if ts.size > 1 and not (ts[1:] >= ts[:-1]).all():
+        order = np.argsort(ts, kind="stable")
+        ts, o, h, l, c, v = (col[order] for col in (ts, o, h, l, c, v))
+    if divisor != 1:
+        for col in (o, h, l, c):
+            np.divide(col, divisor, out=col)
+    return ts, o, h, l, c, v
+
+
+# K-line cache file format: one column per field (SoA) instead of one dict per bar
+KLINE_CACHE_FORMAT = "soa-v1"
+KLINE_FIELDS = ("timestamp", "open", "high", "low", "close", "volume")
+
+# Sidecar next to each cache with its bar count / time range, so stats need not parse the cache
+KLINE_META_SUFFIX = ".meta.json"
+
+_BAR_VALUES = attrgetter(*KLINE_FIELDS)
+_DICT_VALUES = itemgetter(*KLINE_FIELDS)
+
+
+def get_kline_cache_path(mint_address: str, compress: bool = False) -> Path:
+    """K-line cache path for a mint; compress=True gives the zstd variant (<path>.zst)."""
+    path = Path(get_kline_path(mint_address))
+    return path.with_name(path.name + ZSTD_SUFFIX) if compress else path
+
+
+def get_kline_meta_path(cache_path: Path) -> Path:
+    """Sidecar metadata path for a K-line cache file (<stem>.meta.json)."""
+    return cache_path.with_name(cache_path.stem + KLINE_META_SUFFIX)
+
+
+def _bar_chart_values(bar: KLineBar) -> tuple:
+    """KLineBar field values in KLineChart units (timestamp in milliseconds)."""
+    ts, o, h, l, c, v = _BAR_VALUES(bar)
+    return ts * 1000, o, h, l, c, v
+
+
+def klines_to_columns(klines: List[Union[KLineBar, Dict]]) -> Dict[str, np.ndarray]:
+    """
+    Transpose K-line bars (KLineBar or dict format) into NumPy columns.
+
+    Columns use the KLineChart dict units: timestamp in milliseconds.
+
+    Returns:
+        {"timestamp": int64[n], "open": float64[n], ..., "volume": float64[n]}
+    """
+    rows = [_bar_chart_values(k) if isinstance(k, KLineBar) else _DICT_VALUES(k) for k in klines]
+    columns = zip(*rows) if rows else ((),) * len(KLINE_FIELDS)
+    return {
+        field: np.array(values, dtype=np.int64 if field == "timestamp" else np.float64)
+        for field, values in zip(KLINE_FIELDS, columns)
+    }
+
+
+def columns_to_klines(columns: Dict[str, np.ndarray]) -> List[KLineBar]:
+    """Build KLineBar objects (timestamp in seconds) from SoA columns (timestamp in milliseconds)."""
+    return list(map(
+        KLineBar,
+        (columns["timestamp"] // 1000).tolist(),
+        *(columns[field].tolist() for field in KLINE_FIELDS[1:])
+    ))
+
+
+def _sort_dedup_columns(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Ensure SoA columns are sorted by timestamp with unique timestamps.
+
+    Already strictly increasing input (the normal case) is returned as-is after
+    an O(n) check. Otherwise the last occurrence of each timestamp wins.
+    """
+    ts = columns["timestamp"]
+    if len(ts) < 2 or np.all(ts[1:] > ts[:-1]):
+        return columns
+
+    order = np.argsort(ts, kind="stable")
+    ts_sorted = ts[order]
+    is_last = np.append(ts_sorted[1:] != ts_sorted[:-1], True)
+    keep = order[is_last]
+    return {field: columns[field][keep] for field in KLINE_FIELDS}
+
+
+def _merge_sorted_columns(existing: Dict[str, np.ndarray], new: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Two-way merge of timestamp-sorted SoA columns; on equal timestamps the new bar wins.
+
+    No intermediate dict and no full re-sort: existing bars replaced by new ones are
+    masked out, then each new bar is scattered into its merge position.
+    """
+    existing = _sort_dedup_columns(existing)
+    new = _sort_dedup_columns(new)
+    old_ts, new_ts = existing["timestamp"], new["timestamp"]
+
+    if len(new_ts) and len(old_ts):
+        # Drop existing bars whose timestamp also appears in the new data
+        pos = np.minimum(np.searchsorted(new_ts, old_ts), len(new_ts) - 1)
+        kept = new_ts[pos] != old_ts
+        existing = {field: existing[field][kept] for field in KLINE_FIELDS}
+        old_ts = existing["timestamp"]
+
+    total = len(old_ts) + len(new_ts)
+    new_slots = np.searchsorted(old_ts, new_ts) + np.arange(len(new_ts))
+    old_slots = np.ones(total, dtype=bool)
+    old_slots[new_slots] = False
+
+    merged = {}
+    for field in KLINE_FIELDS:
+        column = np.empty(total, dtype=new[field].dtype)
+        column[new_slots] = new[field]
+        column[old_slots] = existing[field]
+        merged[field] = column
+    return merged
+
+
 class KLineNormalizer:
     """
     Normalize and cache K-line data from Birdeye.
@@ -212,91 +656,217 @@ class KLineNormalizer:
     - Price normalization (raw / 10^decimals)
     - Format conversion to KLineChart spec
     - Atomic file persistence
+
+    Cache file format (soa-v1):
+        {"format": "soa-v1", "timestamp": [...], "open": [...], "high": [...],
+         "low": [...], "close": [...], "volume": [...]}
+    Legacy list-of-dict caches are still read and are rewritten as soa-v1 on the next save.
     """
 
-    def __init__(self, mint_address: str, decimals: int = 0):
+    def __init__(
+        self,
+        mint_address: str,
+        decimals: int = 0,
+        compress: bool = False,
+        single_writer: bool = False
+    ):
         """
         Args:
             mint_address: Token mint address
             decimals: Token decimals for price normalization (0 = skip)
+            compress: Store the cache zstd-compressed (<path>.zst, requires zstandard)
+            single_writer: This normalizer is the only writer of the cache (e.g. one
+                           sync loop per mint); saves reuse a fixed temp file
+                           (see atomic_save)
         """
         self.mint_address = mint_address
         self.decimals = decimals
-        self.cache_path = get_kline_path(mint_address)
+        self.divisor = price_divisor(decimals)  # loop-invariant, computed once
+        self.cache_path = get_kline_cache_path(mint_address, compress)
+        # Reused by every save instead of re-deriving them from the path
+        self._parent = self.cache_path.parent
+        self._tmp_prefix = f".{self.cache_path.stem}_"
+        self.meta_path = get_kline_meta_path(self.cache_path)
+        self.single_writer = single_writer
+
+    def _atomic_save(self, data: Any, expected_prev_sha256: Optional[str] = None) -> bool:
+        """atomic_save to cache_path using the precomputed parent/temp prefix."""
+        # Compact: indenting would put every number on its own line
+        return _atomic_save_to(
+            self.cache_path, self._parent, self._tmp_prefix, data,
+            indent=0,
+            expected_prev_sha256=expected_prev_sha256,
+            single_writer=self.single_writer
+        )
 
-    def normalize_birdeye_response(self, items: List[Dict]) -> List[Dict]:
+    def normalize_birdeye_response(self, items: List[Dict]) -> List[KLineBar]:
         """
         Convert Birdeye OHLCV response to KLineChart format.
 
         Input (Birdeye): [{o, h, l, c, v, unixTime}, ...]
-        Output (KLineChart): [{timestamp, open, high, low, close, volume}, ...]
+        Output: [KLineBar(timestamp, open, high, low, close, volume), ...]
 
         Args:
             items: List of Birdeye OHLCV items
 
         Returns:
-            List of K-line bars in dict format
+            List of K-line bars sorted by timestamp (use to_dict() for dict format)
         """
-        result = []
-        for item in items:
-            bar = KLineBar.from_birdeye(item, self.decimals)
-            result.append(bar.to_dict())
+        if not items:
+            return []
+
+        # Extract columns once (one C-level pass per field, no per-row tuples)
+        try:
+            ts, o, h, l, c, v = _birdeye_columns(items)
+        except KeyError:
+            ts, o, h, l, c, v = _birdeye_columns(_with_birdeye_defaults(items))
 
-        # Sort by timestamp ascending
-        result.sort(key=lambda x: x["timestamp"])
-        return result
+        columns = _normalize_ohlcv(ts, o, h, l, c, v, self.divisor)
 
-    def save(self, klines: List[Dict]) -> bool:
+        return list(map(KLineBar, *(col.tolist() for col in columns)))
+
+    def save(
+        self,
+        klines: Union[List[Union[KLineBar, Dict]], Dict[str, np.ndarray]],
+        expected_prev_sha256: Optional[str] = None
+    ) -> bool:
         """
-        Atomically save K-line data to cache.
+        Atomically save K-line data to cache in SoA format.
+
+        Also writes the .meta.json sidecar (count, first/last timestamp, file
+        size and mtime) used by get_cache_stats.
 
         Args:
-            klines: List of K-line bars [{ts, o, h, l, c, v}, ...]
+            klines: List of K-line bars (KLineBar or {timestamp, open, high, low, close, volume}),
+                    or SoA columns as returned by load_columns()
+            expected_prev_sha256: Reject the save if the cache changed since this
+                    hash was taken (see atomic_save)
 
         Returns:
             True if successful
+
+        Raises:
+            StalePreconditionError: expected_prev_sha256 no longer matches the cache
+        """
+        columns = klines if isinstance(klines, dict) else klines_to_columns(klines)
+        data = {"format": KLINE_CACHE_FORMAT}
+        data.update((field, columns[field]) for field in KLINE_FIELDS)
+        if not self._atomic_save(data, expected_prev_sha256):
+            return False
+
+        self._save_meta(columns["timestamp"])
+        return True
+
+    def _save_meta(self, timestamps: Any) -> None:
         """
-        return atomic_save(self.cache_path, klines)
+        Write the sidecar for the cache just saved.
+
+        A failed write only costs get_cache_stats a full parse: the sidecar is
+        ignored unless its size/mtime match the cache file.
+        """
+        try:
+            st = self.cache_path.stat()
+        except OSError as e:
+            print(f"[KLineNormalizer] Could not stat {self.cache_path}: {e}")
+            return
+
+        count = len(timestamps)
+        meta = {
+            "count": count,
+            "first_ts": int(timestamps[0]) if count else None,
+            "last_ts": int(timestamps[-1]) if count else None,
+            "bytes": st.st_size,
+            "mtime_ns": st.st_mtime_ns
+        }
+        _atomic_save_to(self.meta_path, self._parent, self._tmp_prefix, meta, indent=0)
+
+    def load_columns(self) -> Dict[str, np.ndarray]:
+        """
+        Load K-line data from cache as SoA columns (one array allocation per field).
+
+        Returns:
+            {"timestamp": int64[n], "open": float64[n], ...}; empty columns if no cache
+        """
+        return self._to_columns(atomic_load(self.cache_path, default=[]))
+
+    def load_columns_with_sha256(self) -> Tuple[Dict[str, np.ndarray], str]:
+        """
+        load_columns() plus the SHA-256 of the cache as read, to pass to
+        save(expected_prev_sha256=...).
+        """
+        data, sha256 = atomic_load_with_sha256(self.cache_path, default=[])
+        return self._to_columns(data), sha256
+
+    @staticmethod
+    def _to_columns(data: Any) -> Dict[str, np.ndarray]:
+        """Parsed cache file (soa-v1 or legacy list) -> SoA columns."""
+        if isinstance(data, dict) and data.get("format") == KLINE_CACHE_FORMAT:
+            return {
+                field: np.asarray(data[field], dtype=np.int64 if field == "timestamp" else np.float64)
+                for field in KLINE_FIELDS
+            }
+
+        # Legacy list-of-dict format
+        return klines_to_columns(data if isinstance(data, list) else [])
 
     def load(self) -> List[Dict]:
         """
         Load K-line data from cache.
 
         Returns:
-            List of K-line bars or empty list
+            List of K-line bars in dict format or empty list
         """
-        return atomic_load(self.cache_path, default=[])
+        columns = self.load_columns()
+        return [
+            dict(zip(KLINE_FIELDS, row))
+            for row in zip(*(columns[field].tolist() for field in KLINE_FIELDS))
+        ]
 
-    def merge_and_save(self, new_klines: List[Dict]) -> List[Dict]:
+    def merge_and_save(self, new_klines: List[Union[KLineBar, Dict]], max_retries: int = 3) -> List[KLineBar]:
         """
         Merge new K-lines with existing cache and save.
 
-        Deduplicates by timestamp and sorts ascending.
+        Deduplicates by timestamp and sorts ascending. The save is guarded by
+        the hash of the cache as loaded: if another worker replaced the cache
+        in between, the merge is redone on the fresh cache instead of
+        overwriting that worker's bars.
 
         Args:
-            new_klines: New K-line data to merge
+            new_klines: New K-line data to merge (KLineBar or dict format)
+            max_retries: Reload-and-merge attempts after a concurrent write
 
         Returns:
-            Merged K-line data
-        """
-        existing = self.load()
-
-        # Build timestamp -> kline map (newer data overwrites)
-        kline_map = {k["timestamp"]: k for k in existing}
-        for k in new_klines:
-            kline_map[k["timestamp"]] = k
+            Merged K-line bars
 
-        # Sort by timestamp
-        merged = sorted(kline_map.values(), key=lambda x: x["timestamp"])
+        Raises:
+            StalePreconditionError: The cache kept changing for max_retries attempts
+        """
+        new = klines_to_columns(new_klines)
 
-        self.save(merged)
-        return merged
+        for attempt in range(max_retries + 1):
+            existing, sha256 = self.load_columns_with_sha256()
+            # Both sides are already sorted (cache is saved sorted, normalize output is sorted)
+            merged = _merge_sorted_columns(existing, new)
+            try:
+                self.save(merged, expected_prev_sha256=sha256)
+                return columns_to_klines(merged)
+            except StalePreconditionError:
+                if attempt == max_retries:
+                    raise
 
 
 # =============================================================================
 # Trade Data Normalization
 # =============================================================================
 
+# Chart mark style per side: (text prefix, color, label)
+# International standard: buy = green "L" (Long), sell = red "S" (Short)
+_MARK_STYLES = {
+    "buy": ("BUY", "#26a69a", "L"),
+    "sell": ("SELL", "#ef5350", "S"),
+}
+
+
 @dataclass
 class TradeRecord:
     """Normalized trade record."""
@@ -327,14 +897,15 @@ class TradeRecord:
         - Buy: Green "L" label (Long) - #26a69a
         - Sell: Red "S" label (Short) - #ef5350
         """
-        is_buy = self.side == "buy"
+        # One dict hit per mark; unexpected sides fall back to the sell style
+        side_up, color, label = _MARK_STYLES.get(self.side) or (self.side.upper(), "#ef5350", "S")
 
         return {
             "id": idx,
             "time": self.timestamp * 1000,  # milliseconds
-            "color": "#26a69a" if is_buy else "#ef5350",  # 国际标准: 买入=绿色, 卖出=红色
-            "text": f"{self.side.upper()} {self.sol_amount:.4f} SOL",
-            "label": "L" if is_buy else "S"
+            "color": color,  # 国际标准: 买入=绿色, 卖出=红色
+            "text": f"{side_up} {self.sol_amount:.4f} SOL",
+            "label": label
         }
 
 
@@ -391,32 +962,134 @@ def normalize_helius_transfer(
     )
 
 
+def normalize_helius_transfers_batch(
+    transfers: List[Dict],
+    wallet_address: str,
+    sol_changes: List[float],
+    timestamps: List[int],
+    signatures: List[str],
+    token_decimals: int = 9
+) -> List[TradeRecord]:
+    """
+    Convert many Helius token transfers to TradeRecords at once.
+
+    Same result as calling normalize_helius_transfer per transfer and dropping
+    the Nones, but direction, amounts and prices are computed column-wise.
+
+    Args:
+        transfers: Helius tokenTransfer objects
+        wallet_address: User's wallet address
+        sol_changes: SOL balance change per transfer
+        timestamps: Transaction timestamp per transfer
+        signatures: Transaction signature per transfer
+        token_decimals: Token decimals for amount normalization
+
+    Returns:
+        TradeRecords for the transfers that involve the wallet, in input order
+    """
+    n = len(transfers)
+    if n == 0:
+        return []
+
+    to_addr = np.array([t.get("toUserAccount", "") for t in transfers], dtype=object)
+    from_addr = np.array([t.get("fromUserAccount", "") for t in transfers], dtype=object)
+
+    # Determine trade direction (to-wallet wins, as in normalize_helius_transfer)
+    is_buy = to_addr == wallet_address
+    keep = np.flatnonzero(is_buy | (from_addr == wallet_address))
+    if keep.size == 0:
+        return []
+
+    # Normalize amounts
+    raw_amount = np.fromiter(
+        (t.get("tokenAmount") or 0 for t in transfers), dtype=np.float64, count=n
+    )[keep]
+    token_amount = raw_amount / (10 ** token_decimals)
+    sol_amount = np.abs(np.asarray(sol_changes, dtype=np.float64)[keep])
+
+    # Calculate price (SOL per token), 0 where there is no token amount
+    price = np.divide(sol_amount, token_amount, out=np.zeros_like(sol_amount), where=token_amount > 0)
+
+    rows = keep.tolist()
+    return list(map(
+        TradeRecord,
+        np.asarray(timestamps)[keep].tolist(),
+        [signatures[i] for i in rows],
+        np.where(is_buy[keep], "buy", "sell").tolist(),
+        [transfers[i].get("mint", "") for i in rows],
+        token_amount.tolist(),
+        sol_amount.tolist(),
+        price.tolist()
+    ))
+
+
 # =============================================================================
 # Utility Functions
 # =============================================================================
 
-def get_cache_stats(mint_address: str) -> Dict:
+def get_cache_stats(mint_address: str, compress: Optional[bool] = None) -> Dict:
     """
     Get statistics about cached K-line data.
 
+    Reads the .meta.json sidecar written by KLineNormalizer.save; falls back to
+    parsing the whole cache if the sidecar is missing or stale.
+
+    Args:
+        mint_address: Token mint address
+        compress: Which cache to read (True = .zst, False = plain JSON).
+                  None picks the most recently written one, so switching a
+                  normalizer's compress setting never reports the old cache.
+
     Returns:
         Dict with bar_count, first_time, last_time, file_size
     """
-    path = get_kline_path(mint_address)
-
-    if not path.exists():
-        return {"bar_count": 0, "exists": False}
+    if compress is None:
+        candidates = []
+        for path in (get_kline_cache_path(mint_address, compress=True), get_kline_cache_path(mint_address)):
+            try:
+                candidates.append((path.stat(), path))
+            except FileNotFoundError:
+                pass
+        if not candidates:
+            return {"bar_count": 0, "exists": False}
+        st, path = max(candidates, key=lambda c: c[0].st_mtime_ns)
+    else:
+        path = get_kline_cache_path(mint_address, compress=compress)
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return {"bar_count": 0, "exists": False}
+
+    meta = atomic_load(get_kline_meta_path(path))
+    if (
+        isinstance(meta, dict)
+        and meta.get("bytes") == st.st_size
+        and meta.get("mtime_ns") == st.st_mtime_ns
+    ):
+        if not meta.get("count"):
+            return {"bar_count": 0, "exists": True, "empty": True}
+        return {
+            "bar_count": meta["count"],
+            "first_time": meta["first_ts"],
+            "last_time": meta["last_ts"],
+            "file_size": st.st_size,
+            "exists": True
+        }
 
-    klines = atomic_load(path, default=[])
+    data = atomic_load(path, default=[])
+    if isinstance(data, dict) and data.get("format") == KLINE_CACHE_FORMAT:
+        timestamps = data["timestamp"]
+    else:
+        timestamps = [k.get("timestamp") for k in data] if isinstance(data, list) else []
 
-    if not klines:
+    if not timestamps:
         return {"bar_count": 0, "exists": True, "empty": True}
 
     return {
-        "bar_count": len(klines),
-        "first_time": klines[0].get("timestamp") if klines else None,
-        "last_time": klines[-1].get("timestamp") if klines else None,
-        "file_size": path.stat().st_size,
+        "bar_count": len(timestamps),
+        "first_time": timestamps[0],
+        "last_time": timestamps[-1],
+        "file_size": st.st_size,
         "exists": True
     }
 
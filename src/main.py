@@ -5,6 +5,12 @@ This is the main server that:
 1. Fetches on-chain data from Birdeye, Solscan, Helius
 2. Processes and aggregates data into OHLCV format
 3. Serves K-line chart visualization via web interface
+
+Development:
+    python src/main.py
+
+Production (gthread workers, configured in gunicorn.conf.py), from the project root:
+    gunicorn
 """
 
 import os
@@ -137,4 +143,5 @@ if __name__ == '__main__':
     print(f"\nStarting server at http://{FLASK_HOST}:{FLASK_PORT}")
     print("Press Ctrl+C to stop.\n")
 
+    # Dev server only; use gunicorn in production (see module docstring)
     app.run(host=FLASK_HOST, port=FLASK_PORT, debug=FLASK_DEBUG)
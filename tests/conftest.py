@@ -0,0 +1,25 @@
+"""
+Shared pytest setup.
+
+Puts the project root on sys.path (as src/main.py does) so tests can import
+`src.api` and `src.data_processing`.
+"""
+
+import os
+import sys
+import types
+from pathlib import Path
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+# sync_engine imports its data-directory layout from init_dirs, which is
+# generated per deployment. Tests point get_kline_path at tmp_path themselves,
+# so only a placeholder module is needed when it isn't present.
+try:
+    import init_dirs  # noqa: F401
+except ImportError:
+    init_dirs = types.ModuleType("init_dirs")
+    init_dirs.CHART_LIBRARY_DIR = Path(PROJECT_ROOT) / "data" / "charts"
+    init_dirs.get_kline_path = lambda mint_address: init_dirs.CHART_LIBRARY_DIR / f"{mint_address}.json"
+    sys.modules["init_dirs"] = init_dirs
@@ -0,0 +1,351 @@
+"""Tests for BirdeyeClient request coalescing and response handling (no network)."""
+
+import asyncio
+import json
+import logging
+
+import pytest
+
+from src.api import _http, birdeye_client
+from src.api.birdeye_client import BirdeyeClient, BirdeyePriceResult
+
+
+@pytest.fixture
+def client():
+    return BirdeyeClient(api_key="test")
+
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_concurrent_calls(client):
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return BirdeyePriceResult(success=True, value=1.0)
+
+    results = await asyncio.gather(*(client._single_flight("k", fetch) for _ in range(5)))
+
+    assert calls == 1
+    assert all(r.value == 1.0 for r in results)
+    assert client._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_single_flight_owner_cancel_does_not_cancel_waiters(client):
+    calls = 0
+    started = asyncio.Event()
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        started.set()
+        await asyncio.sleep(0.05)
+        return BirdeyePriceResult(success=True, value=float(calls))
+
+    owner = asyncio.create_task(client._single_flight("k", fetch))
+    await started.wait()
+    waiters = [asyncio.create_task(client._single_flight("k", fetch)) for _ in range(3)]
+    await asyncio.sleep(0)
+
+    owner.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await owner
+
+    # Waiters retry; exactly one of them performs the second fetch
+    results = await asyncio.gather(*waiters)
+    assert calls == 2
+    assert [r.value for r in results] == [2.0, 2.0, 2.0]
+
+
+@pytest.mark.asyncio
+async def test_single_flight_waiter_cancel_leaves_owner_running(client):
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        return BirdeyePriceResult(success=True, value=3.0)
+
+    owner = asyncio.create_task(client._single_flight("k", fetch))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(client._single_flight("k", fetch))
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    release.set()
+    assert (await owner).value == 3.0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_exceptions(client):
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        *(client._single_flight("k", fetch) for _ in range(3)),
+        return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert client._inflight == {}
+
+
+def _history(points):
+    return [{"unixTime": t, "value": v} for t, v in points]
+
+
+@pytest.mark.asyncio
+async def test_prices_at_timestamps_uses_nearest_point_within_one_interval(client):
+    async def get_price_history(address, time_from, time_to, interval="1m", verbose=False):
+        return _history((t, float(t)) for t in range(1_700_000_000, 1_700_000_600, 60))
+
+    async def get_prices_bulk(queries, **kwargs):
+        return [BirdeyePriceResult(success=False, error="no data") for _ in queries]
+
+    client.get_price_history = get_price_history
+    client.get_prices_bulk = get_prices_bulk
+
+    prices = await client.get_prices_at_timestamps("mint", [1_700_000_125, 1_700_000_170_000])
+    assert prices == {1_700_000_125: 1_700_000_120.0, 1_700_000_170: 1_700_000_180.0}
+
+
+@pytest.mark.asyncio
+async def test_prices_at_timestamps_does_not_price_from_distant_points(client):
+    ranges = []
+
+    async def get_price_history(address, time_from, time_to, interval="1m", verbose=False):
+        ranges.append((time_from, time_to))
+        # Only data around the first timestamp exists
+        return _history([(1_700_000_180, 1.5)]) if time_from < 1_700_001_000 else []
+
+    bulk_queries = []
+
+    async def get_prices_bulk(queries, **kwargs):
+        bulk_queries.extend(queries)
+        return [BirdeyePriceResult(success=True, value=9.0) for _ in queries]
+
+    client.get_price_history = get_price_history
+    client.get_prices_bulk = get_prices_bulk
+
+    prices = await client.get_prices_at_timestamps("mint", [1_700_000_180, 1_800_000_000])
+
+    # Far-apart timestamps are queried as separate windows, not one huge range
+    assert len(ranges) == 2
+    assert all(time_to - time_from <= 1000 * 60 for time_from, time_to in ranges)
+    # 1_800_000_000 is not priced from the 1_700_000_180 point; it falls back to a point lookup
+    assert bulk_queries == [("mint", 1_800_000_000)]
+    assert prices == {1_700_000_180: 1.5, 1_800_000_000: 9.0}
+
+
+@pytest.mark.asyncio
+async def test_prices_at_timestamps_skips_null_values(client):
+    async def get_price_history(address, time_from, time_to, interval="1m", verbose=False):
+        return [
+            {"unixTime": 1_700_000_000, "value": None},
+            {"unixTime": 1_700_000_060},
+            {"unixTime": 1_700_000_120, "value": 2.0},
+        ]
+
+    client.get_price_history = get_price_history
+
+    prices = await client.get_prices_at_timestamps("mint", [1_700_000_110])
+    assert prices == {1_700_000_110: 2.0}
+    assert (await client.prewarm(["mint"], 1_700_000_000, 1_700_000_200)) == 1
+
+
+@pytest.mark.asyncio
+async def test_prewarm_splits_long_windows(client):
+    # 2500 one-minute points need three requests of at most 1000 points each
+    start = 1_700_000_040
+    end = start + 2499 * 60
+    windows = []
+
+    async def get_price_history(address, time_from, time_to, interval="1m", verbose=False):
+        windows.append((address, time_from, time_to))
+        return [{"unixTime": t, "value": 1.0} for t in range(start, end + 1, 60) if time_from <= t <= time_to]
+
+    client.get_price_history = get_price_history
+
+    count = await client.prewarm(["mint"], start * 1000, end * 1000)
+
+    assert sorted(windows) == [
+        ("mint", start, start + 1000 * 60 - 1),
+        ("mint", start + 1000 * 60, start + 2000 * 60 - 1),
+        ("mint", start + 2000 * 60, end),
+    ]
+    assert count == 2500
+
+
+@pytest.mark.asyncio
+async def test_ohlcv_array_fills_missing_and_null_fields_with_zero(client):
+    async def get_ohlcv(address, time_from, time_to, interval="1m", verbose=False):
+        return [
+            {"unixTime": 60, "o": 1.0, "h": 2.0, "l": 0.5, "c": 1.5, "v": 10.0},
+            {"unixTime": 120, "o": 1.5, "h": 2.5, "l": 1.0, "c": 2.0, "v": None},
+            {"unixTime": 180, "o": 2.0, "h": 3.0, "l": 1.5, "c": 2.5},
+        ]
+
+    client.get_ohlcv = get_ohlcv
+
+    array = await client.get_ohlcv_array("mint", 0, 200)
+    assert array["t"].tolist() == [60, 120, 180]
+    assert array["v"].tolist() == [10.0, 0.0, 0.0]
+    assert array["c"].tolist() == [1.5, 2.0, 2.5]
+
+
+@pytest.mark.asyncio
+async def test_ohlcv_array_empty(client):
+    async def get_ohlcv(address, time_from, time_to, interval="1m", verbose=False):
+        return []
+
+    client.get_ohlcv = get_ohlcv
+
+    assert (await client.get_ohlcv_array("mint", 0, 200)).shape == (0,)
+
+
+class _FakeResponse:
+    def __init__(self, status, headers=None, body=b""):
+        self.status = status
+        self.headers = headers or {}
+        self.body = body
+
+    async def read(self):
+        return self.body
+
+    async def text(self):
+        return "too many requests"
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _RateLimitedSession:
+    """Stand-in aiohttp session that answers every request with 429."""
+
+    closed = False
+
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        return _FakeResponse(429, {"Retry-After": "0"})
+
+
+@pytest.mark.parametrize("call, expected_calls", [
+    (lambda c: c.get_price_history("mint", 1_700_000_000, 1_700_000_600), 1),
+    (lambda c: c.get_ohlcv("mint", 1_700_000_000, 1_700_000_600), 1),
+    (lambda c: c.get_current_price("mint", use_cache=False), 1),
+    # The point lookup retries once after backing off
+    (lambda c: c.get_price_at_timestamp("mint", 1_700_000_000, use_cache=False), 2),
+])
+@pytest.mark.asyncio
+async def test_429_engages_shared_backoff_on_every_endpoint(client, call, expected_calls, monkeypatch):
+    penalties = []
+    client.rate_limiter.penalize = penalties.append
+    session = _RateLimitedSession()
+    monkeypatch.setattr(birdeye_client, "_get_shared_session", lambda: session)
+
+    result = await call(client)
+
+    assert result == [] or result.success is False
+    assert session.calls == expected_calls
+    assert penalties == ["0"] * expected_calls
+
+
+def test_client_reused_across_event_loops_gets_fresh_session(client):
+    async def current_session():
+        await client._ensure_session()
+        return client.session
+
+    try:
+        first = asyncio.run(current_session())
+        second = asyncio.run(current_session())
+        # The session bound to the finished loop is replaced and closed
+        assert second is not first
+        assert first.closed
+        assert not second.closed
+    finally:
+        asyncio.run(_http.close_shared_session())
+
+
+class _ScriptedSession:
+    """Stand-in aiohttp session that replays canned responses and records request headers."""
+
+    closed = False
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sent_headers = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.sent_headers.append(dict(headers or {}))
+        return self.responses.pop(0)
+
+
+@pytest.mark.parametrize("method, item", [
+    ("get_price_history", {"unixTime": 1_700_000_000, "value": 1.5}),
+    ("get_ohlcv", {"unixTime": 1_700_000_000, "o": 1.0, "h": 2.0, "l": 0.5, "c": 1.5, "v": 10.0}),
+])
+@pytest.mark.asyncio
+async def test_conditional_get_reuses_items_on_304(client, method, item, monkeypatch):
+    body = json.dumps({"success": True, "data": {"items": [item]}}).encode()
+    session = _ScriptedSession(
+        _FakeResponse(200, {"ETag": '"v1"'}, body),
+        _FakeResponse(304),
+    )
+    monkeypatch.setattr(birdeye_client, "_get_shared_session", lambda: session)
+    fetch = getattr(client, method)
+
+    first = await fetch("mint", 1_700_000_000, 1_700_000_600)
+    second = await fetch("mint", 1_700_000_000, 1_700_000_600)
+
+    assert first == [item]
+    assert second == [item]
+    # The first request is unconditional, the second revalidates with the stored ETag
+    assert "If-None-Match" not in session.sent_headers[0]
+    assert session.sent_headers[1]["If-None-Match"] == '"v1"'
+    assert client.successful_requests == 2
+
+
+@pytest.fixture
+def package_logger():
+    logger = _http._package_logger
+    saved = logger.level, list(logger.handlers), logger.propagate
+    yield logger
+    logger.setLevel(saved[0])
+    logger.handlers[:] = saved[1]
+    logger.propagate = saved[2]
+
+
+def _history_session():
+    body = json.dumps({"success": True, "data": {"items": [{"unixTime": 1_700_000_000, "value": 1.5}]}}).encode()
+    return _ScriptedSession(_FakeResponse(200, body=body))
+
+
+@pytest.mark.asyncio
+async def test_verbose_logs_reach_configured_handlers(client, package_logger, caplog, monkeypatch):
+    monkeypatch.setattr(birdeye_client, "_get_shared_session", _history_session)
+
+    await client.get_price_history("mint", 1_700_000_000, 1_700_000_600)
+    assert not [r for r in caplog.records if r.levelno >= logging.INFO]
+
+    await client.get_price_history("mint", 1_700_000_000, 1_700_000_600, verbose=True)
+    assert any(r.levelno == logging.INFO and "1 个价格点" in r.getMessage() for r in caplog.records)
+
+
+@pytest.mark.asyncio
+async def test_verbose_prints_to_stderr_without_logging_config(client, package_logger, capsys, monkeypatch):
+    package_logger.propagate = False
+    monkeypatch.setattr(birdeye_client, "_get_shared_session", _history_session)
+
+    await client.get_price_history("mint", 1_700_000_000, 1_700_000_600, verbose=True)
+
+    assert "1 个价格点" in capsys.readouterr().err
@@ -0,0 +1,73 @@
+"""Tests for the SQLite historical price store."""
+
+import pytest
+
+from src.api import price_store
+from src.api.birdeye_client import BirdeyeClient
+from src.api.price_store import PriceStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "prices.sqlite")
+
+
+def test_put_is_buffered_until_flush(db_path):
+    store = PriceStore(db_path, flush_size=10)
+    store.put("mint", 100, 1.5, 99)
+
+    assert store.pending == 1
+    assert store.get("mint", 100) is None
+
+    store.flush()
+    assert store.pending == 0
+    assert store.get("mint", 100) == (1.5, 99)
+    store.close()
+
+
+def test_get_does_not_wait_for_the_write_lock(db_path):
+    store = PriceStore(db_path)
+    store.put_many([("mint", ts, float(ts), ts) for ts in range(5)])
+    store.flush()
+
+    # Simulate a flush in progress on another thread
+    with store._lock:
+        assert store.get("mint", 3) == (3.0, 3)
+    store.close()
+
+
+def test_close_is_idempotent_and_persists_pending_rows(db_path):
+    store = PriceStore(db_path)
+    store.put("mint", 1, 2.0)
+    store.close()
+    store.close()
+
+    reopened = PriceStore(db_path)
+    assert reopened.get("mint", 1) == (2.0, None)
+    reopened.close()
+
+
+def test_unclosed_stores_are_flushed_at_exit(db_path):
+    store = PriceStore(db_path)
+    store.put("mint", 1, 2.0)
+
+    price_store._close_stores_at_exit()
+
+    reopened = PriceStore(db_path)
+    assert reopened.get("mint", 1) == (2.0, None)
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_client_close_closes_disk_cache(db_path):
+    client = BirdeyeClient(api_key="test", disk_cache_path=db_path)
+    store = client._disk_cache
+    store.put("mint", 1, 2.0)
+
+    await client.close()
+
+    assert client._disk_cache is None
+    assert store._closed
+    reopened = PriceStore(db_path)
+    assert reopened.get("mint", 1) == (2.0, None)
+    reopened.close()
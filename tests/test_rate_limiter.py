@@ -0,0 +1,149 @@
+"""Tests for the token-bucket RateLimiter, driven by a fake monotonic clock."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.api import rate_limiter
+from src.api.rate_limiter import RateLimiter
+
+NS = 1_000_000_000
+
+
+class FakeClock:
+    """monotonic_ns / sleep replacement: sleeping records the delay instead of waiting."""
+
+    def __init__(self):
+        self.now = 10 * NS
+        self.delays = {}
+
+    def monotonic_ns(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.delays[asyncio.current_task()] = seconds
+
+    def advance(self, seconds):
+        self.now += int(seconds * NS)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", SimpleNamespace(monotonic_ns=clock.monotonic_ns))
+    monkeypatch.setattr(rate_limiter, "asyncio", SimpleNamespace(Lock=asyncio.Lock, sleep=clock.sleep))
+    return clock
+
+
+async def send_time(limiter, clock):
+    """Acquire and return the (fake) time in seconds at which the request may be sent."""
+    await limiter.acquire()
+    return (clock.now + clock.delays.pop(asyncio.current_task(), 0) * NS) / NS
+
+
+async def send_times(limiter, clock, n):
+    return await asyncio.gather(*(send_time(limiter, clock) for _ in range(n)))
+
+
+@pytest.mark.asyncio
+async def test_full_bucket_allows_a_burst_of_capacity_requests(clock):
+    limiter = RateLimiter(max_per_minute=60, min_interval=0)
+
+    times = await send_times(limiter, clock, 61)
+
+    assert times[:60] == [10.0] * 60
+    assert times[60] == pytest.approx(11.0)
+
+
+@pytest.mark.asyncio
+async def test_steady_state_rate_after_burst(clock):
+    limiter = RateLimiter(max_per_minute=60, min_interval=0)
+    await send_times(limiter, clock, 60)
+
+    times = await send_times(limiter, clock, 5)
+
+    # One token per second once the bucket is empty
+    assert times == pytest.approx([11.0, 12.0, 13.0, 14.0, 15.0])
+
+
+@pytest.mark.asyncio
+async def test_bucket_refills_over_time(clock):
+    limiter = RateLimiter(max_per_minute=60, min_interval=0)
+    await send_times(limiter, clock, 60)
+
+    clock.advance(3)
+    times = await send_times(limiter, clock, 4)
+
+    assert times == pytest.approx([13.0, 13.0, 13.0, 14.0])
+
+
+@pytest.mark.asyncio
+async def test_min_interval_spacing_under_gather(clock):
+    limiter = RateLimiter(max_per_minute=6000, min_interval=0.1)
+
+    times = await send_times(limiter, clock, 5)
+
+    assert times == pytest.approx([10.0, 10.1, 10.2, 10.3, 10.4])
+
+
+@pytest.mark.asyncio
+async def test_penalize_uses_retry_after_then_exponential_backoff(clock, monkeypatch):
+    monkeypatch.setattr(rate_limiter.random, "randint", lambda a, b: 0)
+    limiter = RateLimiter(max_per_minute=6000, min_interval=0)
+
+    limiter.penalize("3")
+    assert await send_time(limiter, clock) == pytest.approx(13.0)
+
+    clock.advance(3)
+    limiter.penalize(None)          # 2nd strike: 2^1 s
+    assert await send_time(limiter, clock) == pytest.approx(15.0)
+
+    clock.advance(2)
+    limiter.penalize(None)          # 3rd strike: 2^2 s
+    assert await send_time(limiter, clock) == pytest.approx(19.0)
+
+    clock.advance(4)
+    limiter.reset_backoff()
+    limiter.penalize(None)          # strikes reset: 1 s default
+    assert await send_time(limiter, clock) == pytest.approx(20.0)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_429s_count_as_one_backoff_episode(clock, monkeypatch):
+    monkeypatch.setattr(rate_limiter.random, "randint", lambda a, b: 0)
+    limiter = RateLimiter(max_per_minute=6000, min_interval=0)
+
+    async def rate_limited_response():
+        limiter.penalize(None)
+
+    # Eight in-flight requests all answered with 429, plus a late 200 from before the backoff
+    await asyncio.gather(*(rate_limited_response() for _ in range(8)))
+    limiter.reset_backoff()
+
+    assert await send_time(limiter, clock) == pytest.approx(11.0)
+
+    clock.advance(1)
+    limiter.penalize(None)          # next episode: 2^1 s, not 2^8 s
+    assert await send_time(limiter, clock) == pytest.approx(13.0)
+
+
+@pytest.mark.asyncio
+async def test_penalize_caps_backoff_and_adds_bounded_jitter(clock):
+    limiter = RateLimiter(max_per_minute=6000, min_interval=0)
+
+    limiter.penalize("3600")
+
+    delay = await send_time(limiter, clock) - 10.0
+    assert 60.0 <= delay <= 60.5
+
+
+@pytest.mark.parametrize("retry_after", ["nan", "inf", "-inf", "Wed, 21 Oct 2015 07:28:00 GMT", object()])
+@pytest.mark.asyncio
+async def test_penalize_treats_unusable_retry_after_as_default(clock, monkeypatch, retry_after):
+    monkeypatch.setattr(rate_limiter.random, "randint", lambda a, b: 0)
+    limiter = RateLimiter(max_per_minute=6000, min_interval=0)
+
+    limiter.penalize(retry_after)
+
+    assert await send_time(limiter, clock) == pytest.approx(11.0)
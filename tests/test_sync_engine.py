@@ -0,0 +1,455 @@
+"""Tests for K-line normalization, the SoA cache and trade records in sync_engine."""
+
+import json
+
+import numpy as np
+import pytest
+
+from src.data_processing import sync_engine
+from src.data_processing.sync_engine import (
+    KLineBar,
+    KLineNormalizer,
+    columns_to_klines,
+    klines_to_columns,
+)
+
+
+@pytest.fixture(autouse=True)
+def kline_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(sync_engine, "get_kline_path", lambda mint: tmp_path / f"{mint}.json")
+    return tmp_path
+
+
+def bar(ts, price=1.0, volume=10.0):
+    return KLineBar(ts, price, price + 1, price - 0.5, price + 0.5, volume)
+
+
+# -----------------------------------------------------------------------------
+# KLineBar units
+# -----------------------------------------------------------------------------
+
+def test_kline_bar_timestamp_is_seconds_and_chart_output_is_milliseconds():
+    b = KLineBar.from_birdeye({"unixTime": 1_700_000_000, "o": 1, "h": 2, "l": 0.5, "c": 1.5, "v": 7})
+
+    assert b.timestamp == 1_700_000_000
+    assert b.to_dict()["timestamp"] == 1_700_000_000_000
+    assert b.to_list()[0] == 1_700_000_000_000
+
+
+def test_normalize_returns_bars_in_seconds():
+    items = [
+        {"unixTime": 120, "o": 2e9, "h": 3e9, "l": 1e9, "c": 2.5e9, "v": 5},
+        {"unixTime": 60, "o": 1e9, "h": 2e9, "l": 0.5e9, "c": 1.5e9, "v": 4},
+    ]
+
+    bars = KLineNormalizer("mint", decimals=9).normalize_birdeye_response(items)
+
+    assert bars == [KLineBar(60, 1.0, 2.0, 0.5, 1.5, 4.0), KLineBar(120, 2.0, 3.0, 1.0, 2.5, 5.0)]
+
+
+def test_columns_are_milliseconds_and_round_trip_to_seconds():
+    bars = [bar(60), bar(120)]
+    columns = klines_to_columns(bars)
+
+    assert columns["timestamp"].tolist() == [60_000, 120_000]
+    assert klines_to_columns([b.to_dict() for b in bars])["timestamp"].tolist() == [60_000, 120_000]
+    assert columns_to_klines(columns) == bars
+
+
+def test_orjson_and_stdlib_encoders_agree_on_bars(monkeypatch):
+    data = [bar(60)]
+    fast = json.loads(sync_engine._dumps(data, indent=0))
+    monkeypatch.setattr(sync_engine, "orjson", None)
+    slow = json.loads(sync_engine._dumps(data, indent=0))
+
+    assert fast == slow == [bar(60).to_dict()]
+
+
+# -----------------------------------------------------------------------------
+# SoA merge
+# -----------------------------------------------------------------------------
+
+def reference_merge(existing, new):
+    """The original dict-based merge: dedupe by timestamp (new wins), sort ascending."""
+    by_ts = {k["timestamp"]: k for k in existing}
+    by_ts.update((k["timestamp"], k) for k in new)
+    return [by_ts[ts] for ts in sorted(by_ts)]
+
+
+def random_dicts(rng, n, ts_pool, tag):
+    return [
+        {
+            "timestamp": int(ts) * 1000,
+            "open": float(tag), "high": float(i), "low": 0.0, "close": 1.0, "volume": float(tag * 1000 + i),
+        }
+        for i, ts in enumerate(rng.choice(ts_pool, size=n))
+    ]
+
+
+def to_dicts(columns):
+    return [dict(zip(sync_engine.KLINE_FIELDS, row)) for row in zip(*(columns[f].tolist() for f in sync_engine.KLINE_FIELDS))]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_merge_matches_reference_dict_merge(seed):
+    rng = np.random.default_rng(seed)
+    pool = np.arange(200)
+    existing = reference_merge([], random_dicts(rng, rng.integers(0, 150), pool, tag=1))
+    # New data may be unsorted and contain duplicate timestamps (last occurrence wins)
+    new = random_dicts(rng, rng.integers(0, 150), pool, tag=2)
+
+    merged = sync_engine._merge_sorted_columns(klines_to_columns(existing), klines_to_columns(new))
+
+    assert to_dicts(merged) == reference_merge(existing, new)
+
+
+def test_merge_new_bar_wins_on_equal_timestamp():
+    existing = klines_to_columns([bar(60, price=1.0), bar(120, price=1.0)])
+    new = klines_to_columns([bar(120, price=5.0), bar(180, price=5.0)])
+
+    merged = columns_to_klines(sync_engine._merge_sorted_columns(existing, new))
+
+    assert [(b.timestamp, b.open) for b in merged] == [(60, 1.0), (120, 5.0), (180, 5.0)]
+
+
+def test_merge_interleaves_and_handles_empty_sides():
+    existing = klines_to_columns([bar(60), bar(180)])
+    new = klines_to_columns([bar(0), bar(120), bar(240)])
+    empty = klines_to_columns([])
+
+    merged = sync_engine._merge_sorted_columns(existing, new)
+    assert merged["timestamp"].tolist() == [0, 60_000, 120_000, 180_000, 240_000]
+    assert sync_engine._merge_sorted_columns(empty, new)["timestamp"].tolist() == [0, 120_000, 240_000]
+    assert sync_engine._merge_sorted_columns(existing, empty)["timestamp"].tolist() == [60_000, 180_000]
+    assert sync_engine._merge_sorted_columns(empty, empty)["timestamp"].tolist() == []
+
+
+def test_sort_dedup_keeps_last_occurrence():
+    columns = klines_to_columns([bar(120, price=1.0), bar(60, price=2.0), bar(120, price=3.0)])
+
+    result = sync_engine._sort_dedup_columns(columns)
+
+    assert result["timestamp"].tolist() == [60_000, 120_000]
+    assert result["open"].tolist() == [2.0, 3.0]
+
+
+def test_sort_dedup_returns_sorted_input_unchanged():
+    columns = klines_to_columns([bar(60), bar(120)])
+    assert sync_engine._sort_dedup_columns(columns) is columns
+
+
+# -----------------------------------------------------------------------------
+# Cache load paths (SoA and legacy list-of-dict)
+# -----------------------------------------------------------------------------
+
+def test_save_writes_soa_and_load_round_trips(kline_dir):
+    normalizer = KLineNormalizer("mint")
+    bars = [bar(60), bar(120)]
+
+    assert normalizer.save(bars)
+
+    on_disk = json.loads((kline_dir / "mint.json").read_text())
+    assert on_disk["format"] == "soa-v1"
+    assert on_disk["timestamp"] == [60_000, 120_000]
+    assert normalizer.load() == [b.to_dict() for b in bars]
+    assert columns_to_klines(normalizer.load_columns()) == bars
+
+
+def test_legacy_list_cache_is_read_and_merged(kline_dir):
+    legacy = [bar(60).to_dict(), bar(120, price=1.0).to_dict()]
+    (kline_dir / "mint.json").write_text(json.dumps(legacy))
+    normalizer = KLineNormalizer("mint")
+
+    assert normalizer.load() == legacy
+
+    merged = normalizer.merge_and_save([bar(120, price=9.0), bar(180)])
+
+    assert [(b.timestamp, b.open) for b in merged] == [(60, 1.0), (120, 9.0), (180, 1.0)]
+    on_disk = json.loads((kline_dir / "mint.json").read_text())
+    assert on_disk["format"] == "soa-v1"
+    assert on_disk["timestamp"] == [60_000, 120_000, 180_000]
+
+
+def test_load_without_cache_returns_empty_columns():
+    columns = KLineNormalizer("missing").load_columns()
+    assert all(len(columns[f]) == 0 for f in sync_engine.KLINE_FIELDS)
+
+
+# -----------------------------------------------------------------------------
+# Optimistic-concurrency guard
+# -----------------------------------------------------------------------------
+
+def test_atomic_save_raises_on_stale_precondition_and_keeps_file(tmp_path):
+    path = tmp_path / "data.json"
+    assert sync_engine.atomic_save(path, {"v": 1})
+    sha = sync_engine.file_sha256(path)
+    assert sync_engine.atomic_save(path, {"v": 2})
+
+    with pytest.raises(sync_engine.StalePreconditionError):
+        sync_engine.atomic_save(path, {"v": 3}, expected_prev_sha256=sha)
+
+    assert sync_engine.atomic_load(path) == {"v": 2}
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == ".tmp"] == []
+
+
+def test_atomic_load_with_sha256_matches_file_sha256(tmp_path):
+    path = tmp_path / "data.json"
+    assert sync_engine.atomic_load_with_sha256(path, default=[]) == ([], "")
+
+    sync_engine.atomic_save(path, {"v": 1})
+    assert sync_engine.atomic_load_with_sha256(path) == ({"v": 1}, sync_engine.file_sha256(path))
+
+
+def test_journal_is_opt_in(tmp_path):
+    path = tmp_path / "data.json"
+    journal = tmp_path / sync_engine.JOURNAL_DIR_NAME / sync_engine.JOURNAL_FILE_NAME
+
+    sync_engine.atomic_save(path, {"v": 1}, expected_prev_sha256="")
+    KLineNormalizer("mint").merge_and_save([bar(60)])
+    assert not journal.exists()
+
+    assert sync_engine.atomic_save(path, {"v": 2}, journal=True)
+    rows = [json.loads(line) for line in journal.read_text().splitlines()]
+    assert [row["sha256"] for row in rows] == [sync_engine.file_sha256(path)]
+
+
+def test_atomic_save_raises_on_write_corruption_and_keeps_file(tmp_path, monkeypatch):
+    path = tmp_path / "data.json"
+    assert sync_engine.atomic_save(path, {"v": 1})
+    monkeypatch.setattr(sync_engine, "file_sha256", lambda p: "corrupted")
+
+    with pytest.raises(sync_engine.WriteCorruptionError):
+        sync_engine.atomic_save(path, {"v": 2}, journal=True)
+
+    assert sync_engine.atomic_load(path) == {"v": 1}
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == ".tmp"] == []
+
+
+def test_merge_and_save_redoes_merge_after_concurrent_write(monkeypatch):
+    ours = KLineNormalizer("mint")
+    theirs = KLineNormalizer("mint")
+    ours.save([bar(60)])
+
+    original_load = KLineNormalizer.load_columns_with_sha256
+    interleaved = []
+
+    def load_then_other_worker_writes(self):
+        result = original_load(self)
+        if not interleaved:
+            interleaved.append(True)
+            theirs.merge_and_save([bar(120)])
+        return result
+
+    monkeypatch.setattr(KLineNormalizer, "load_columns_with_sha256", load_then_other_worker_writes)
+
+    merged = ours.merge_and_save([bar(180)])
+
+    # The other worker's bar survives instead of being overwritten
+    assert [b.timestamp for b in merged] == [60, 120, 180]
+    assert [b.timestamp for b in columns_to_klines(ours.load_columns())] == [60, 120, 180]
+
+
+def test_merge_and_save_gives_up_after_max_retries(monkeypatch):
+    normalizer = KLineNormalizer("mint")
+    normalizer.save([bar(60)])
+    monkeypatch.setattr(
+        KLineNormalizer, "load_columns_with_sha256",
+        lambda self: (self.load_columns(), "not-the-current-hash")
+    )
+
+    with pytest.raises(sync_engine.StalePreconditionError):
+        normalizer.merge_and_save([bar(120)], max_retries=2)
+
+    assert [b.timestamp for b in columns_to_klines(normalizer.load_columns())] == [60]
+
+
+# -----------------------------------------------------------------------------
+# single_writer temp files
+# -----------------------------------------------------------------------------
+
+@pytest.mark.parametrize("single_writer", [False, True])
+def test_atomic_save_mode_does_not_depend_on_single_writer(tmp_path, single_writer):
+    path = tmp_path / "data.json"
+
+    assert sync_engine.atomic_save(path, {"v": 1}, single_writer=single_writer)
+
+    assert path.stat().st_mode & 0o777 == 0o600
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["data.json"]
+
+
+def test_single_writer_normalizer_reuses_fixed_temp_file(kline_dir, monkeypatch):
+    opened = []
+    real_open = sync_engine.os.open
+    monkeypatch.setattr(sync_engine.os, "open", lambda path, *args: opened.append(path) or real_open(path, *args))
+    normalizer = KLineNormalizer("mint", single_writer=True)
+
+    normalizer.save([bar(60)])
+    normalizer.merge_and_save([bar(120)])
+
+    # (the .meta.json sidecar still goes through mkstemp)
+    assert opened.count(kline_dir / ".mint_.tmp") == 2
+    assert [b.timestamp for b in columns_to_klines(normalizer.load_columns())] == [60, 120]
+
+
+# -----------------------------------------------------------------------------
+# Cache stats sidecar
+# -----------------------------------------------------------------------------
+
+@pytest.fixture
+def loaded_paths(monkeypatch):
+    """Record every path get_cache_stats parses."""
+    paths = []
+    real_load = sync_engine.atomic_load
+    monkeypatch.setattr(sync_engine, "atomic_load", lambda path, *a, **kw: paths.append(path) or real_load(path, *a, **kw))
+    return paths
+
+
+def test_cache_stats_uses_fresh_sidecar_without_parsing_cache(loaded_paths):
+    normalizer = KLineNormalizer("mint")
+    normalizer.save([bar(60), bar(120), bar(180)])
+
+    stats = sync_engine.get_cache_stats("mint")
+
+    assert stats["bar_count"] == 3
+    assert (stats["first_time"], stats["last_time"]) == (60_000, 180_000)
+    assert stats["file_size"] == normalizer.cache_path.stat().st_size
+    assert loaded_paths == [normalizer.meta_path]
+
+
+def test_cache_stats_falls_back_when_cache_size_changed(loaded_paths):
+    normalizer = KLineNormalizer("mint")
+    normalizer.save([bar(60)])
+    # Rewritten behind the normalizer's back: the sidecar still describes one bar
+    sync_engine.atomic_save(normalizer.cache_path, {
+        "format": sync_engine.KLINE_CACHE_FORMAT,
+        **klines_to_columns([bar(60), bar(120)]),
+    })
+
+    stats = sync_engine.get_cache_stats("mint")
+
+    assert stats["bar_count"] == 2
+    assert stats["last_time"] == 120_000
+    assert normalizer.cache_path in loaded_paths
+
+
+def test_cache_stats_falls_back_when_cache_mtime_changed(loaded_paths):
+    normalizer = KLineNormalizer("mint")
+    normalizer.save([bar(60), bar(120)])
+    st = normalizer.cache_path.stat()
+    sync_engine.os.utime(normalizer.cache_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    stats = sync_engine.get_cache_stats("mint")
+
+    assert stats["bar_count"] == 2
+    assert normalizer.cache_path in loaded_paths
+
+
+def test_cache_stats_without_sidecar_parses_cache():
+    normalizer = KLineNormalizer("mint")
+    normalizer.save([bar(60), bar(120)])
+    normalizer.meta_path.unlink()
+
+    stats = sync_engine.get_cache_stats("mint")
+
+    assert (stats["bar_count"], stats["first_time"], stats["last_time"]) == (2, 60_000, 120_000)
+
+
+def test_cache_stats_for_empty_and_missing_cache():
+    assert sync_engine.get_cache_stats("mint") == {"bar_count": 0, "exists": False}
+
+    KLineNormalizer("mint").save([])
+
+    assert sync_engine.get_cache_stats("mint") == {"bar_count": 0, "exists": True, "empty": True}
+
+
+def test_cache_stats_reads_newest_cache_after_switching_compression():
+    old = sync_engine.get_kline_cache_path("mint", compress=True)
+    old.write_bytes(b"stale zstd cache")
+    sync_engine.os.utime(old, ns=(0, 0))
+
+    KLineNormalizer("mint", compress=False).save([bar(60), bar(120)])
+
+    assert sync_engine.get_cache_stats("mint")["bar_count"] == 2
+    assert sync_engine.get_cache_stats("mint", compress=False)["bar_count"] == 2
+    # Asking for the compressed cache explicitly still reads it (unparseable here)
+    assert sync_engine.get_cache_stats("mint", compress=True)["bar_count"] == 0
+
+
+# -----------------------------------------------------------------------------
+# zstd-compressed caches
+# -----------------------------------------------------------------------------
+
+def test_zst_atomic_save_round_trips(tmp_path):
+    pytest.importorskip("zstandard")
+    path = tmp_path / "data.json.zst"
+
+    assert sync_engine.atomic_save(path, {"v": [1, 2, 3]})
+
+    assert path.read_bytes()[:4] == b"\x28\xb5\x2f\xfd"  # zstd frame magic
+    assert sync_engine.atomic_load(path) == {"v": [1, 2, 3]}
+
+
+def test_zst_normalizer_save_load_and_stats():
+    pytest.importorskip("zstandard")
+    normalizer = KLineNormalizer("mint", compress=True)
+
+    normalizer.save([bar(60), bar(120)])
+    merged = normalizer.merge_and_save([bar(180)])
+
+    assert normalizer.cache_path.name == "mint.json.zst"
+    assert [b.timestamp for b in merged] == [60, 120, 180]
+    assert columns_to_klines(normalizer.load_columns()) == merged
+    assert sync_engine.get_cache_stats("mint")["bar_count"] == 3
+
+
+# -----------------------------------------------------------------------------
+# Trade records
+# -----------------------------------------------------------------------------
+
+def trade(side):
+    return sync_engine.TradeRecord(
+        timestamp=1_700_000_000, signature="sig", side=side, token_mint="mint",
+        token_amount=100.0, sol_amount=1.23456, price=0.0123456
+    )
+
+
+def test_to_mark_styles_buy_and_sell():
+    assert trade("buy").to_mark(1) == {
+        "id": 1, "time": 1_700_000_000_000, "color": "#26a69a", "text": "BUY 1.2346 SOL", "label": "L"
+    }
+    assert trade("sell").to_mark(2) == {
+        "id": 2, "time": 1_700_000_000_000, "color": "#ef5350", "text": "SELL 1.2346 SOL", "label": "S"
+    }
+
+
+def test_to_mark_follows_side_changes_after_construction():
+    record = trade("buy")
+    record.side = "sell"
+
+    mark = record.to_mark(0)
+    assert (mark["text"], mark["color"], mark["label"]) == ("SELL 1.2346 SOL", "#ef5350", "S")
+
+
+def test_batch_trade_normalization_matches_per_transfer():
+    wallet = "wallet"
+    transfers = [
+        {"fromUserAccount": "pool", "toUserAccount": wallet, "mint": "m1", "tokenAmount": 5_000_000},
+        {"fromUserAccount": wallet, "toUserAccount": "pool", "mint": "m1", "tokenAmount": 2_000_000},
+        {"fromUserAccount": "a", "toUserAccount": "b", "mint": "m2", "tokenAmount": 1},
+        {"fromUserAccount": "pool", "toUserAccount": wallet, "mint": "m3", "tokenAmount": None},
+    ]
+    sol_changes = [-1.5, 0.75, 0.0, -0.1]
+    timestamps = [1, 2, 3, 4]
+    signatures = ["s1", "s2", "s3", "s4"]
+
+    expected = [
+        r for r in (
+            sync_engine.normalize_helius_transfer(t, wallet, sc, ts, sig, 6)
+            for t, sc, ts, sig in zip(transfers, sol_changes, timestamps, signatures)
+        )
+        if r is not None
+    ]
+    batch = sync_engine.normalize_helius_transfers_batch(transfers, wallet, sol_changes, timestamps, signatures, 6)
+
+    assert batch == expected
+    assert [r.side for r in batch] == ["buy", "sell", "buy"]